@@ -1,21 +1,32 @@
 # -*- coding: utf-8 -*-
 
-import re
-import json
 import time
-import math
+
+# 进程开始导入的时刻，--profile-startup 以此为起点
+_started = time.perf_counter()
+
+import os
+import queue
 import asyncio
-import traceback
-import websockets
-import webbrowser
-import dns.resolver
-from pygame import mixer
+import argparse
+import threading
 from threading import Thread
+from collections import OrderedDict
 from os import path as os_path
-from typing import Callable, Optional, Any
-from datetime import datetime, timedelta, timezone
-from PySide6.QtCore import Qt, QEvent, QTimer, QObject
-from PySide6.QtGui import QPixmap, QIcon, QFont, QFontDatabase, QAction
+from typing import Callable, Any
+from qasync import QEventLoop
+from PySide6.QtCore import Qt, QEvent, QTimer, QObject, QFileSystemWatcher, Signal
+from PySide6.QtGui import (
+    QPixmap,
+    QIcon,
+    QFont,
+    QFontDatabase,
+    QAction,
+    QImage,
+    QPainter,
+    QPen,
+    QColor,
+)
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -31,17 +42,144 @@ from PySide6.QtWidgets import (
     QMessageBox,
     QSystemTrayIcon,
     QMenu,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QAbstractItemView,
+)
+from sceew_core import (
+    version,
+    get_bjt,
+    error_report,
+    setup_logging,
+    logger,
+    _semver_tuple,
+    get_latest_version,
+    ConfigStore,
+    config_store,
+    get_config,
+    get_travel_time_table,
+    CountdownScheduler,
+    evaluate_report,
+    LatencyStats,
+    metrics,
+    startup,
+    FrameRecorder,
+    FEED_URL,
+    add_common_arguments,
+    get_feeds,
+    FeedClient,
+    EventStore,
+    EEWReport,
+    ReportHistory,
+    IntensityGrid,
+    replay_feed,
 )
-
-try:
-    from plyer import notification as _plyer_notification
-except Exception:
-    _plyer_notification = None
 
 NotifyFn = Callable[..., Any]
-notify: Optional[NotifyFn] = None
-if _plyer_notification is not None:
-    notify = getattr(_plyer_notification, "notify", None)
+
+
+def _plyer_notify() -> NotifyFn | None:
+    """plyer 在第一次发送通知时才导入。"""
+    try:
+        from plyer import notification
+    except Exception:
+        return None
+    return getattr(notification, "notify", None)
+
+
+class NotificationDispatcher:
+    """
+    在独立线程中发送桌面通知，接收循环只负责入队。
+    同一事件尚未发出的通知会被新一报替换；队列有上限，满时丢弃最早的通知。
+    每次调用最多等待 timeout 秒，超时的调用留在原线程中，之后换新线程继续发送。
+    """
+
+    def __init__(
+        self,
+        notify_fn: NotifyFn | None = None,
+        max_pending: int = 8,
+        timeout: float = 5.0,
+        max_hung: int = 4,
+    ):
+        self._notify = notify_fn
+        self._max_pending = max_pending
+        self._timeout = timeout
+        self._max_hung = max_hung
+        self._hung: list[Thread] = []
+        self._cond = threading.Condition()
+        self._pending: OrderedDict[Any, tuple[float, dict]] = OrderedDict()
+        self._thread: Thread | None = None
+
+    def submit(self, key, received: float | None = None, **kwargs) -> None:
+        """加入待发送队列，从不阻塞。"""
+        with self._cond:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="notify", daemon=True)
+                self._thread.start()
+            if key in self._pending:
+                self._pending[key] = (received, kwargs)
+            else:
+                if len(self._pending) >= self._max_pending:
+                    dropped, _ = self._pending.popitem(last=False)
+                    logger.warning("notify: 通知队列已满，丢弃事件 %s 的通知", dropped)
+                self._pending[key] = (received, kwargs)
+            self._cond.notify()
+
+    def _call(self, kwargs: dict) -> None:
+        try:
+            if self._notify is None:
+                self._notify = _plyer_notify()
+                if self._notify is None:
+                    logger.warning("notify: plyer 不可用，不发送桌面通知")
+                    self._notify = lambda **kwargs: None
+            self._notify(**kwargs)
+        except:
+            error_report()
+
+    def _caller(self, calls: queue.Queue) -> None:
+        while True:
+            item = calls.get()
+            if item is None:
+                return
+            kwargs, done = item
+            self._call(kwargs)
+            done.set()
+
+    def _run(self) -> None:
+        # 通知由常驻的调用线程发出；只有调用超时时才换一个新的调用线程
+        calls: queue.Queue | None = None
+        caller: Thread | None = None
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                _, (received, kwargs) = self._pending.popitem(last=False)
+            self._hung = [t for t in self._hung if t.is_alive()]
+            if len(self._hung) >= self._max_hung:
+                logger.warning("notify: 通知服务无响应，跳过本条通知")
+                continue
+            if caller is None:
+                calls = queue.Queue()
+                caller = Thread(
+                    target=self._caller, args=(calls,), name="notify-call", daemon=True
+                )
+                caller.start()
+            done = threading.Event()
+            calls.put((kwargs, done))
+            if done.wait(self._timeout):
+                metrics.observe("notify", received)
+            else:
+                # 卡住的调用返回后，该线程读到 None 即退出
+                calls.put(None)
+                self._hung.append(caller)
+                caller = None
+                logger.warning(
+                    "notify: 发送通知超过 %.0f 秒，已放弃等待", self._timeout
+                )
+
+
+notifier = NotificationDispatcher()
 
 (
     settings_window,
@@ -60,125 +198,138 @@ if _plyer_notification is not None:
     None,
     None,
 )  # noqa: E501
-with open("errors.log", "w", encoding="utf-8") as f:
-    pass
-
-
-BJT = timezone(timedelta(hours=8))
-
 
-def get_bjt():
-    return datetime.now(BJT)
 
+class UpdateNotifier(QObject):
+    """后台线程检查更新，结果通过信号投递到 GUI 线程再弹窗。"""
 
-def parse_bjt(s: str) -> datetime:
-    """Parse 'YYYY-mm-dd HH:MM:SS' as timezone-aware Beijing Time."""
-    return datetime.strptime(s, "%Y-%m-%d %H:%M:%S").replace(tzinfo=BJT)
+    available = Signal(str)
 
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.available.connect(self._prompt)
 
-def error_report():
-    error_time = get_bjt().strftime("%Y-%m-%d %H:%M:%S\n")
-    error_log = traceback.format_exc()
-    print(error_time + error_log + "\n")
-    with open("errors.log", "a", encoding="utf-8") as f:
-        f.write(error_time + error_log + "\n")
+    def _prompt(self, latest_version: str) -> None:
+        try:
+            # 主窗口可能尚未构建或已释放
+            reply = QMessageBox.question(
+                main_window.widget,
+                f"四川地震预警(SCEEW) v{version}",
+                f"检测到新版本v{latest_version}, 是否前往更新?",
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                import webbrowser
 
+                webbrowser.open("https://github.com/TenkyuChimata/SCEEW/releases")
+        except Exception:
+            error_report()
 
-def _parse_version_from_txt(txt: str) -> str | None:
-    # 支持：version=1.2.3（允许前后有其它字段）
-    m = re.search(r"version\s*=\s*([0-9]+(?:\.[0-9]+)*)", txt)
-    return m.group(1) if m else None
+    def _check(self) -> None:
+        try:
+            latest_version = get_latest_version()
+            if latest_version and _semver_tuple(latest_version) > _semver_tuple(
+                version
+            ):
+                self.available.emit(latest_version)
+        except Exception:
+            error_report()
 
+    def start(self) -> None:
+        Thread(target=self._check, daemon=True).start()
 
-def _semver_tuple(v: str):
-    # "1.2.3" -> (1,2,3)；多段也行，缺段按 0 补
-    v = re.sub(r"[^0-9.]", "", (v or "").strip())
-    if not v:
-        return (0, 0, 0)
-    return tuple(int(x) if x else 0 for x in v.split("."))
 
+def get_update(parent=None):
+    try:
+        notifier = UpdateNotifier(parent)
+        notifier.start()
+        return notifier
+    except Exception:
+        error_report()
 
-def _fetch_version_from_dns_txt(domain: str, timeout: float = 5.0) -> str:
-    """
-    从 DNS TXT 记录中提取 version=x.x.x 的版本号并返回。
-    """
-    resolver = dns.resolver.Resolver(configure=True)
-    resolver.lifetime = timeout  # 总超时
-    resolver.timeout = timeout  # 单次超时
 
-    answers = resolver.resolve(domain, "TXT")
+FONT_PATH = "./assets/fonts/SDK_SC_Web.ttf"
+
+
+class FontRegistry:
+    """字体只在启动时注册一次，按字号缓存 QFont；字体文件缺失时回退到系统字体。"""
+
+    def __init__(self, font_path: str = FONT_PATH):
+        self._path = font_path
+        self._loaded = False
+        self._family: str | None = None
+        self._fonts: dict[int, QFont] = {}
+        self.load_time = 0.0
+
+    def load(self) -> str | None:
+        if self._loaded:
+            return self._family
+        self._loaded = True
+        start = time.perf_counter()
+        if os_path.exists(self._path):
+            font_id = QFontDatabase.addApplicationFont(self._path)
+            if font_id != -1:
+                families = QFontDatabase.applicationFontFamilies(font_id)
+                if families:
+                    self._family = families[0]
+        self.load_time = time.perf_counter() - start
+        if self._family:
+            logger.info(
+                "font: %s 加载耗时 %.1f ms", self._family, self.load_time * 1000
+            )
+        else:
+            logger.warning("font: 未能加载字体 %s，使用系统默认字体", self._path)
+        return self._family
 
-    # 一个域名可能有多条 TXT，逐条找包含 version= 的
-    for rdata in answers:
-        # dnspython 返回的 TXT 可能是多段 string 切片，拼起来
-        parts = []
-        for s in getattr(rdata, "strings", []):
-            parts.append(s.decode("utf-8", errors="ignore"))
-        txt = "".join(parts).strip()
+    def font(self, font_size: int) -> QFont:
+        font = self._fonts.get(font_size)
+        if font is None:
+            family = self.load()
+            font = QFont()
+            font.setPointSize(font_size)
+            if family:
+                font.setFamily(family)
+            self._fonts[font_size] = font
+        return font
 
-        v = _parse_version_from_txt(txt)
-        if v:
-            return v
 
-    raise ValueError(f"TXT record for {domain} does not contain version=...")
+font_registry = FontRegistry()
 
 
-def get_update(window):
+def set_font(label, font_size):
     try:
-        latest_version = _fetch_version_from_dns_txt("sceew.mtf.edu.kg", timeout=5.0)
+        label.setFont(font_registry.font(font_size))
+    except:
+        error_report()
 
-        if _semver_tuple(latest_version) > _semver_tuple(version):
-            reply = QMessageBox.question(
-                window,
-                f"四川地震预警(SCEEW) v{version}",
-                f"检测到新版本v{latest_version}, 是否前往更新?",
-            )
-            if reply == QMessageBox.StandardButton.Yes:
-                webbrowser.open("https://github.com/TenkyuChimata/SCEEW/releases")
 
-    except Exception:
-        error_report()
+def watch_config(store: ConfigStore, parent=None) -> QFileSystemWatcher:
+    """用 QFileSystemWatcher 监视配置文件，变化时在 GUI 线程重新加载。"""
+    store.get()
+    watcher = QFileSystemWatcher(parent)
+    watcher.addPath(os_path.abspath(store.path))
 
+    def on_changed(changed_path):
+        try:
+            if store.reload():
+                request_refresh()
+            # 原子替换后部分平台会丢失监视，需要重新添加
+            if changed_path not in watcher.files() and os_path.exists(changed_path):
+                watcher.addPath(changed_path)
+        except:
+            error_report()
 
-def set_font(label, font_size):
-    try:
-        font = QFont()
-        font.setPointSize(font_size)
-        font_id = QFontDatabase.addApplicationFont("./assets/fonts/SDK_SC_Web.ttf")
-        font_family = QFontDatabase.applicationFontFamilies(font_id)[0]
-        font.setFamily(font_family)
-        label.setFont(font)
-    except:
-        error_report()
+    watcher.fileChanged.connect(on_changed)
+    return watcher
 
 
-def get_config():
-    try:
-        if os_path.exists("config.json"):
-            with open("config.json", "r", encoding="utf-8") as f:
-                config_data = json.load(f)
-            return config_data
-        else:
-            raise KeyError("Incomplete")
-    except KeyError:
-        config_data = {
-            "audio": True,
-            "auto_window": True,
-            "notification": True,
-            "location": "成都市青羊区",
-            "latitude": 30.68,
-            "longitude": 104.05,
-        }
-        with open("config.json", "w", encoding="utf-8") as f:
-            json.dump(config_data, f, ensure_ascii=False)
-        return config_data
-    except:
-        error_report()
-        return None
+def request_refresh() -> None:
+    """让接收循环按新设定重新计算各事件的倒计时并显示最近一报（线程安全）。"""
+    if feed_client is not None and refresh_display is not None:
+        feed_client.call_soon(refresh_display)
 
 
 def save_settings() -> None:
-    global location_value, latitude_value, longitude_value, audio_value, auto_window_value, notification_value, config_updated  # noqa: E501
+    global location_value, latitude_value, longitude_value, audio_value, auto_window_value, notification_value  # noqa: E501
     try:
         if location_value:
             config_data = {
@@ -189,11 +340,8 @@ def save_settings() -> None:
                 "latitude": latitude_value,
                 "longitude": longitude_value,
             }
-            with open("config.json", "w", encoding="utf-8") as f:
-                json.dump(config_data, f, ensure_ascii=False)
-            config_updated = True
-            if websocket:
-                asyncio.run(websocket.send("query_sceew"))
+            config_store.update(config_data)
+            request_refresh()
             (
                 location_value,
                 latitude_value,
@@ -241,6 +389,8 @@ def settings_update(
 
 def open_coordinate_picker():
     try:
+        import webbrowser
+
         webbrowser.open("https://lbs.qq.com/getPoint/")
     except:
         error_report()
@@ -457,360 +607,918 @@ def create_about_tab() -> QWidget:
         return tab
 
 
-def open_settings_window():
-    global settings_window
+history = ReportHistory()
+
+
+def create_history_tab() -> QWidget:
+    tab = QWidget()
+    layout = QVBoxLayout(tab)
+    page_size = 50
+    # 每一页起点的游标，第一页为 None；next_cursor 为下一页的起点
+    cursors: list = [None]
+    next_cursor: list = [None]
+
     try:
-        if settings_window is None:
-            settings_window = QWidget()
-            settings_window.setWindowTitle("设定")
-            settings_window.setWindowIcon(QIcon("./assets/images/icon.ico"))
-            settings_window.setStyleSheet("background-color: #808080;")
-            settings_window.setFixedSize(600, 400)
-            layout = QVBoxLayout()
-            tab_widget = QTabWidget()
-            tab_widget.addTab(create_general_tab(), "一般")
-            tab_widget.addTab(create_about_tab(), "关于")
-            tab_widget.setStyleSheet(
-                """
-            @font-face {
-                font-family: SDK_SC_Web;
-                src: url("./assets/fonts/SDK_SC_Web.ttf") format("truetype");
-            }
-            QTabWidget::pane {
-                border: 0;
-            }
-            QTabWidget::tab-bar {
-                alignment: center;
-            }
-            QTabBar::tab {
-                background: #808080;
-                color: white;
-                padding: 8px;
-                margin-right: 2px;
-                border-top-left-radius: 4px;
-                border-top-right-radius: 4px;
-                font-family: SDK_SC_Web;
-                font-size: 14px;
-                border-bottom: 3px solid white;
-            }
-            QTabBar::tab:selected {
-                background: #9d9d9d;
-                color: white;
-            }"""
-            )
-            layout.addWidget(tab_widget)
-            settings_window.setLayout(layout)
+        table = QTableWidget(0, 6)
+        table.setHorizontalHeaderLabels(
+            ["发震时间", "震中", "震级", "最大烈度", "报数", "数据源"]
+        )
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.ResizeToContents
+        )
+        table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        table.setStyleSheet("color: white; background-color: #9d9d9d;")
+        layout.addWidget(table)
+
+        controls = QHBoxLayout()
+        magnitude_label = QLabel("最小震级")
+        magnitude_label.setStyleSheet("color: white;")
+        magnitude_input = QLineEdit()
+        magnitude_input.setFixedWidth(60)
+        magnitude_input.setStyleSheet("color: white;")
+        prev_button = QPushButton("上一页")
+        next_button = QPushButton("下一页")
+        for button in (prev_button, next_button):
+            button.setStyleSheet("background-color: #9d9d9d; color: white;")
+        page_label = QLabel("")
+        page_label.setStyleSheet("color: white;")
+        controls.addWidget(magnitude_label)
+        controls.addWidget(magnitude_input)
+        controls.addStretch(1)
+        controls.addWidget(page_label)
+        controls.addWidget(prev_button)
+        controls.addWidget(next_button)
+        layout.addLayout(controls)
+
+        def load_page() -> None:
+            try:
+                text = magnitude_input.text().strip()
+                min_magnitude = float(text) if text else None
+            except ValueError:
+                min_magnitude = None
+            try:
+                rows = history.query(
+                    page_size + 1, before=cursors[-1], min_magnitude=min_magnitude
+                )
+            except:
+                error_report()
+                rows = []
+            has_next = len(rows) > page_size
+            rows = rows[:page_size]
+            table.setRowCount(len(rows))
+            for i, row in enumerate(rows):
+                values = (
+                    row["origin_time"],
+                    row["hypocenter"],
+                    f"M{row['magnitude']}",
+                    row["max_intensity"],
+                    row["report_num"],
+                    row["source"],
+                )
+                for j, value in enumerate(values):
+                    table.setItem(i, j, QTableWidgetItem(str(value)))
+            if rows:
+                next_cursor[0] = (rows[-1]["origin_time"], rows[-1]["id"])
+            next_button.setEnabled(has_next)
+            prev_button.setEnabled(len(cursors) > 1)
+            page_label.setText(f"第 {len(cursors)} 页")
+
+        def next_page() -> None:
+            cursors.append(next_cursor[0])
+            load_page()
+
+        def prev_page() -> None:
+            if len(cursors) > 1:
+                cursors.pop()
+            load_page()
+
+        def reset() -> None:
+            del cursors[1:]
+            load_page()
+
+        next_button.clicked.connect(next_page)
+        prev_button.clicked.connect(prev_page)
+        magnitude_input.editingFinished.connect(reset)
+        tab.reload = reset
+        load_page()
+        return tab
+
+    except Exception:
+        error_report()
+        msg = QLabel("历史记录加载失败，请查看错误报告/日志。")
+        msg.setStyleSheet("color: white;")
+        msg.setWordWrap(True)
+        layout.addWidget(msg)
+        layout.addStretch(1)
+        return tab
 
-        class CloseSaveFilter(QObject):
-            def __init__(self, on_close, parent=None):
-                super().__init__(parent)
-                self._on_close = on_close
 
-            def eventFilter(self, a0, a1) -> bool:
-                if a1 is not None and a1.type() == QEvent.Type.Close:
-                    self._on_close()
-                return False
+def build_settings_window() -> QWidget:
+    class CloseSaveFilter(QObject):
+        def __init__(self, on_close, parent=None):
+            super().__init__(parent)
+            self._on_close = on_close
+
+        def eventFilter(self, a0, a1) -> bool:
+            if a1 is not None and a1.type() == QEvent.Type.Close:
+                self._on_close()
+            return False
+
+    window = QWidget()
+    window.setWindowTitle("设定")
+    window.setWindowIcon(QIcon("./assets/images/icon.ico"))
+    window.setStyleSheet("background-color: #808080;")
+    window.setFixedSize(600, 400)
+    layout = QVBoxLayout()
+    tab_widget = QTabWidget()
+    tab_widget.addTab(create_general_tab(), "一般")
+    window.history_tab = create_history_tab()
+    tab_widget.addTab(window.history_tab, "历史")
+    tab_widget.addTab(create_about_tab(), "关于")
+    tab_widget.setStyleSheet(
+        """
+    @font-face {
+        font-family: SDK_SC_Web;
+        src: url("./assets/fonts/SDK_SC_Web.ttf") format("truetype");
+    }
+    QTabWidget::pane {
+        border: 0;
+    }
+    QTabWidget::tab-bar {
+        alignment: center;
+    }
+    QTabBar::tab {
+        background: #808080;
+        color: white;
+        padding: 8px;
+        margin-right: 2px;
+        border-top-left-radius: 4px;
+        border-top-right-radius: 4px;
+        font-family: SDK_SC_Web;
+        font-size: 14px;
+        border-bottom: 3px solid white;
+    }
+    QTabBar::tab:selected {
+        background: #9d9d9d;
+        color: white;
+    }"""
+    )
+    layout.addWidget(tab_widget)
+    window.setLayout(layout)
+    close_filter = CloseSaveFilter(on_close=save_settings, parent=window)
+    window.installEventFilter(close_filter)
+    return window
+
 
-        close_filter = CloseSaveFilter(on_close=save_settings, parent=settings_window)
-        settings_window.installEventFilter(close_filter)
-        settings_window.setProperty("_close_filter", close_filter)
-        settings_window.show()
+def open_settings_window():
+    try:
+        window = settings_window.show()
+        # 重新打开设定窗口时刷新历史记录
+        reload_history = getattr(window.history_tab, "reload", None)
+        if reload_history is not None:
+            reload_history()
     except:
         error_report()
 
 
-def custom_close_event(event):
-    window.hide()  # 隐藏窗口，而不是退出程序
-    event.ignore()  # 忽略关闭事件，从而避免程序退出
+class LabelBridge(QObject):
+    """
+    工作线程只发布标签文本，由排队信号转到 GUI 线程；
+    同一帧内的多次更新合并为一次刷新，文本未变化的标签直接跳过。
+    """
 
+    FRAME_MS = 16
+    _pending_signal = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._labels: dict[str, QLabel] = {}
+        self._texts: dict[str, str] = {}
+        self._pending: dict[str, str] = {}
+        self._since: float | None = None
+        self._scheduled = False
+        self._pending_signal.connect(
+            self._schedule_flush, Qt.ConnectionType.QueuedConnection
+        )
 
-def alert(alert_type, level):
-    try:
-        if audio_bool:
+    def bind(self, name: str, label: QLabel) -> None:
+        """绑定时补上最近一次的文本，窗口重新构建后内容不丢失。"""
+        self._labels[name] = label
+        label.setText(self._texts.get(name, label.text()))
+
+    def unbind_all(self) -> None:
+        self._labels.clear()
+
+    def set_text(self, name: str, text: str, since: float | None = None) -> None:
+        """since 为触发本次更新的报文接收时刻，用于统计报文到标签刷新的耗时。"""
+        with self._lock:
+            self._pending[name] = text
+            if since is not None and (self._since is None or since < self._since):
+                self._since = since
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._pending_signal.emit()
+
+    def _schedule_flush(self) -> None:
+        QTimer.singleShot(self.FRAME_MS, self._flush)
+
+    def _flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            since, self._since = self._since, None
+            self._scheduled = False
+        for name, text in pending.items():
+            try:
+                if self._texts.get(name) == text:
+                    continue
+                self._texts[name] = text
+                label = self._labels.get(name)
+                if label is not None:
+                    label.setText(text)
+            except:
+                error_report()
+        if since is not None:
+            metrics.observe("label", since)
+
+
+class IntensityMap(QLabel):
+    """
+    四川预估烈度图。底图与城市标注各只栅格化一次；每条报文只重算一次烈度层，
+    合成后缓存为 QPixmap，窗口重绘时直接使用缓存。
+    """
+
+    # 市州政府驻地 (纬度, 经度)
+    CITIES = {
+        "成都": (30.66, 104.07),
+        "绵阳": (31.47, 104.68),
+        "德阳": (31.13, 104.40),
+        "广元": (32.44, 105.84),
+        "巴中": (31.87, 106.75),
+        "达州": (31.21, 107.47),
+        "南充": (30.84, 106.11),
+        "遂宁": (30.53, 105.59),
+        "广安": (30.46, 106.63),
+        "资阳": (30.12, 104.63),
+        "内江": (29.58, 105.06),
+        "自贡": (29.34, 104.78),
+        "泸州": (28.87, 105.44),
+        "宜宾": (28.77, 104.63),
+        "乐山": (29.55, 103.77),
+        "眉山": (30.08, 103.85),
+        "雅安": (29.98, 103.01),
+        "康定": (30.05, 101.96),
+        "马尔康": (31.90, 102.22),
+        "西昌": (27.89, 102.26),
+        "攀枝花": (26.58, 101.72),
+    }
+
+    requested = Signal(float, float, float, float, float)
+
+    def __init__(self, width: int = 320, height: int = 260, parent=None):
+        super().__init__(parent)
+        self.setFixedSize(width, height)
+        self._grid = IntensityGrid(width, height)
+        self._basemap = self._render_basemap()
+        self._overlay = self._render_overlay()
+        self.setPixmap(self._compose(None))
+        # 其他线程调用 show_report 时经队列连接回到界面线程绘制
+        self.requested.connect(self.render_report)
+
+    def _render_basemap(self) -> QPixmap:
+        grid = self._grid
+        pixmap = QPixmap(grid.width, grid.height)
+        pixmap.fill(QColor("#9d9d9d"))
+        painter = QPainter(pixmap)
+        painter.setPen(QPen(QColor(255, 255, 255, 60), 1))
+        lat_min, lat_max, lon_min, lon_max = grid.bounds
+        for lat in range(int(lat_min) + 1, int(lat_max) + 1):
+            y = grid.to_pixel(lat, lon_min)[1]
+            painter.drawLine(0, int(y), grid.width, int(y))
+        for lon in range(int(lon_min) + 1, int(lon_max) + 1):
+            x = grid.to_pixel(lat_min, lon)[0]
+            painter.drawLine(int(x), 0, int(x), grid.height)
+        painter.end()
+        return pixmap
+
+    def _render_overlay(self) -> QPixmap:
+        grid = self._grid
+        pixmap = QPixmap(grid.width, grid.height)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(font_registry.font(8))
+        painter.setPen(QColor("white"))
+        painter.setBrush(QColor("white"))
+        for name, (lat, lon) in self.CITIES.items():
+            x, y = grid.to_pixel(lat, lon)
+            painter.drawEllipse(int(x) - 2, int(y) - 2, 4, 4)
+            painter.drawText(int(x) + 4, int(y) + 4, name)
+        painter.end()
+        return pixmap
+
+    def _compose(self, layer: QImage | None, marks=()) -> QPixmap:
+        pixmap = QPixmap(self._basemap)
+        painter = QPainter(pixmap)
+        if layer is not None:
+            painter.drawImage(0, 0, layer)
+        painter.drawPixmap(0, 0, self._overlay)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for (x, y), color in marks:
+            painter.setPen(QPen(QColor(color), 3))
+            painter.drawLine(int(x) - 6, int(y) - 6, int(x) + 6, int(y) + 6)
+            painter.drawLine(int(x) - 6, int(y) + 6, int(x) + 6, int(y) - 6)
+        painter.end()
+        return pixmap
+
+    def show_report(self, eq_lat, eq_lon, magnitude, site_lat, site_lon) -> None:
+        """可在任意线程调用。"""
+        self.requested.emit(eq_lat, eq_lon, magnitude, site_lat, site_lon)
+
+    def render_report(self, eq_lat, eq_lon, magnitude, site_lat, site_lon) -> None:
+        try:
+            grid = self._grid
+            argb = grid.to_argb(grid.compute(eq_lat, eq_lon, magnitude))
+            layer = QImage(
+                argb.data,
+                grid.width,
+                grid.height,
+                grid.width * 4,
+                QImage.Format.Format_ARGB32,
+            )
+            marks = (
+                (grid.to_pixel(site_lat, site_lon), "#1f5fbf"),
+                (grid.to_pixel(eq_lat, eq_lon), "#d40000"),
+            )
+            self.setPixmap(self._compose(layer, marks))
+            metrics.observe("map")
+        except:
+            error_report()
+
+
+def show_intensity_map(*report) -> None:
+    """记录最近一报的烈度图参数；主窗口未构建时只记录，构建时再绘制。"""
+    global map_report
+    map_report = report
+    if intensity_map is not None:
+        intensity_map.show_report(*report)
+
+
+class LazyWindow(QObject):
+    """
+    首次显示时才构建窗口；隐藏超过 release_after 秒后销毁，再次显示时重新构建。
+    release_after 为 0 时隐藏后不释放。
+    """
+
+    def __init__(self, factory, release_after=600.0, on_release=None, parent=None):
+        super().__init__(parent)
+        self._factory = factory
+        self._on_release = on_release
+        self._widget = None
+        self.release_after = release_after
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.release)
+
+    @property
+    def widget(self):
+        return self._widget
+
+    def show(self):
+        if self._widget is None:
+            self._widget = self._factory()
+            self._widget.installEventFilter(self)
+        self._widget.showNormal()
+        self._widget.raise_()
+        self._widget.activateWindow()
+        return self._widget
+
+    def eventFilter(self, a0, a1) -> bool:
+        if a0 is self._widget and a1 is not None:
+            if a1.type() == QEvent.Type.Hide and self.release_after > 0:
+                self._timer.start(int(self.release_after * 1000))
+            elif a1.type() == QEvent.Type.Show:
+                self._timer.stop()
+        return False
+
+    def release(self) -> None:
+        widget = self._widget
+        if widget is None or widget.isVisible():
+            return
+        self._widget = None
+        try:
+            if self._on_release is not None:
+                self._on_release()
+            widget.removeEventFilter(self)
+            widget.deleteLater()
+            logger.info("window: 已释放隐藏的窗口 %s", widget.windowTitle())
+        except:
+            error_report()
+
+
+class MainWindow(QMainWindow):
+    def changeEvent(self, event: QEvent) -> None:
+        if event.type() == QEvent.Type.WindowStateChange:
+            if self.isMinimized():
+                QTimer.singleShot(0, self.hide)
+        super().changeEvent(event)
+
+    def closeEvent(self, event) -> None:
+        self.hide()  # 隐藏窗口，而不是退出程序
+        event.ignore()  # 忽略关闭事件，从而避免程序退出
+
+
+def build_main_window() -> MainWindow:
+    global intensity_map
+    window = MainWindow()
+    window.setWindowTitle(f"四川地震预警(SCEEW) v{version}")
+    window.setFixedSize(600, 680)
+    window.setWindowIcon(QIcon("./assets/images/icon.ico"))
+    window.setStyleSheet("background-color: #808080;")
+    central_widget = QWidget()
+    window.setCentralWidget(central_widget)
+    layout = QVBoxLayout()
+    central_widget.setLayout(layout)
+    title_text = QLabel("四川地震预警")
+    title_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    title_text.setStyleSheet("color: white; padding-top: 10px;")
+    set_font(title_text, 25)
+    layout.addWidget(title_text)
+    warn_icon = QLabel()
+    warn_icon.setPixmap(QPixmap("./assets/images/warn.png"))
+    warn_icon.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    layout.addWidget(warn_icon)
+    subcdinfo_text = QLabel("")
+    subcdinfo_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    subcdinfo_text.setStyleSheet("color: white;")
+    set_font(subcdinfo_text, 20)
+    layout.addWidget(subcdinfo_text)
+    tips_text = QLabel("")
+    tips_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    tips_text.setStyleSheet("color: white;")
+    set_font(tips_text, 15)
+    layout.addWidget(tips_text)
+    eq_info_layout = QHBoxLayout()
+    layout.addLayout(eq_info_layout)
+    eqloc_frame = QWidget()
+    eqloc_frame.setStyleSheet("background-color: #9d9d9d;")
+    eq_info_layout.addWidget(eqloc_frame)
+    eqloc_layout = QVBoxLayout(eqloc_frame)
+    eqloc_text = QLabel("")
+    eqloc_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    eqloc_text.setStyleSheet("color: white;")
+    set_font(eqloc_text, 15)
+    eqloc_layout.addWidget(eqloc_text)
+    eqmag_frame = QWidget()
+    eqmag_frame.setStyleSheet("background-color: #9d9d9d;")
+    eq_info_layout.addWidget(eqmag_frame)
+    eqmag_layout = QVBoxLayout(eqmag_frame)
+    eqmag_text = QLabel("")
+    eqmag_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    eqmag_text.setStyleSheet("color: white;")
+    set_font(eqmag_text, 15)
+    eqmag_layout.addWidget(eqmag_text)
+    eqtime_frame = QWidget()
+    eqtime_frame.setStyleSheet("background-color: #9d9d9d;")
+    eq_info_layout.addWidget(eqtime_frame)
+    eqtime_layout = QVBoxLayout(eqtime_frame)
+    eqtime_text = QLabel("")
+    eqtime_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    eqtime_text.setStyleSheet("color: white;")
+    set_font(eqtime_text, 15)
+    eqtime_layout.addWidget(eqtime_text)
+    intensity_map = IntensityMap(parent=window)
+    if map_report is not None:
+        intensity_map.render_report(*map_report)
+    layout.addWidget(intensity_map, alignment=Qt.AlignmentFlag.AlignCenter)
+    info_text = QLabel("")
+    info_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    info_text.setStyleSheet("color: white;")
+    set_font(info_text, 15)
+    layout.addWidget(info_text)
+    ui.bind("subcdinfo", subcdinfo_text)
+    ui.bind("tips", tips_text)
+    ui.bind("eqloc", eqloc_text)
+    ui.bind("eqmag", eqmag_text)
+    ui.bind("eqtime", eqtime_text)
+    ui.bind("info", info_text)
+    settings_button = QPushButton("⚙", window)
+    settings_button.setGeometry(560, 640, 25, 25)
+    settings_button.clicked.connect(open_settings_window)
+    return window
+
+
+def release_main_window() -> None:
+    global intensity_map
+    ui.unbind_all()
+    intensity_map = None
+
+
+class AudioEngine:
+    """
+    常驻音频引擎：mixer 只初始化一次，预警音与倒计时音效预先解码为 Sound 对象。
+    预警音固定在一个通道播放，高等级抢占低等级；倒计时音效在另一个通道排队播放。
+    传入 decided_at 时，把从预警决定到声音开始输出的耗时记为 audio_output 指标：
+    即到 Channel.play() 返回为止的实测耗时，加上一个 mixer 缓冲区的估算输出延迟
+    （BUFFER_SIZE / 采样率），不含声卡与操作系统音频栈的延迟。
+    """
+
+    SAMPLE_RATE = 44100
+    BUFFER_SIZE = 512
+    COUNTDOWN_TICKS = 15
+
+    def __init__(self, sound_dir: str = "./assets/sounds"):
+        self._sound_dir = sound_dir
+        self._lock = threading.Lock()
+        self._ready = False
+        self._eew_sounds: dict[int, Any] = {}
+        self._countdown_sound = None
+        self._eew_channel = None
+        self._countdown_channel = None
+        self._eew_level = -1
+        self._eew_ends_at = 0.0
+        self._output_delay = 0.0
+
+    def init(self) -> None:
+        with self._lock:
+            if self._ready:
+                return
+            # 不让 SDL 接管 SIGINT/SIGTERM，否则进程无法被正常终止
+            os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+            # pygame 导入较慢，在这里才导入，不拖慢窗口显示
+            from pygame import mixer
+
+            mixer.pre_init(self.SAMPLE_RATE, -16, 2, self.BUFFER_SIZE)
             mixer.init()
-            if alert_type == "EEW":
-                mixer.music.load(f".//assets//sounds//EEW{level}.wav")
-                mixer.music.play()
-                while mixer.music.get_busy():
-                    time.sleep(0.1)
+            mixer.set_num_channels(2)
+            mixer.set_reserved(2)
+            for level in range(3):
+                self._eew_sounds[level] = mixer.Sound(
+                    os_path.join(self._sound_dir, f"EEW{level}.wav")
+                )
+            # 15 次倒计时音效预先拼接成一段，一次排队播放，无需轮询
+            tick = mixer.Sound(os_path.join(self._sound_dir, "countdown.wav"))
+            self._countdown_sound = mixer.Sound(
+                buffer=tick.get_raw() * self.COUNTDOWN_TICKS
+            )
+            self._eew_channel = mixer.Channel(0)
+            self._countdown_channel = mixer.Channel(1)
+            frequency = (mixer.get_init() or (self.SAMPLE_RATE,))[0]
+            self._output_delay = self.BUFFER_SIZE / frequency
+            self._ready = True
+
+    def _record_latency(self, decided_at: float | None) -> None:
+        if decided_at is not None:
+            metrics.observe("audio_output", decided_at - self._output_delay)
+
+    def play_eew(self, level: int, decided_at: float | None = None) -> bool:
+        """播放预警音；正在播放更高等级的预警音时忽略本次请求。"""
+        self.init()
+        with self._lock:
+            now = time.monotonic()
+            playing = self._eew_channel.get_busy() and now < self._eew_ends_at
+            if playing and level < self._eew_level:
+                return False
+            sound = self._eew_sounds[level]
+            self._eew_channel.play(sound)
+            self._eew_level = level
+            self._eew_ends_at = now + sound.get_length()
+            self._record_latency(decided_at)
+            return True
+
+    def play_countdown(self, decided_at: float | None = None) -> None:
+        self.init()
+        with self._lock:
+            if self._countdown_channel.get_busy():
+                self._countdown_channel.queue(self._countdown_sound)
             else:
-                mixer.music.load(".//assets//sounds//countdown.wav")
-                for _ in range(15):
-                    mixer.music.play()
-                    while mixer.music.get_busy():
-                        time.sleep(0.01)
-            mixer.quit()
+                self._countdown_channel.play(self._countdown_sound)
+            self._record_latency(decided_at)
+
+
+audio_engine = AudioEngine()
+
+
+def warm_up_audio() -> None:
+    try:
+        audio_engine.init()
+        startup.mark("audio")
     except:
         error_report()
-        mixer.quit()
 
 
-def distance(lat1, lon1, lat2, lon2):
+def alert(alert_type, level, decided_at=None):
     try:
-        radius = 6378.137
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = math.sin(dlat / 2) * math.sin(dlat / 2) + math.cos(
-            math.radians(lat1)
-        ) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) * math.sin(dlon / 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        d = radius * c
-        return d
+        if audio_bool:
+            if alert_type == "EEW":
+                audio_engine.play_eew(level, decided_at)
+            else:
+                audio_engine.play_countdown(decided_at)
     except:
         error_report()
-        return 0
 
 
-def countdown(user_location, distance, ctime):
+def show_countdown(label: tuple, s_countdown: int) -> None:
+    user_location, p_arrival = label
+    if not s_countdown:
+        ui.set_text("subcdinfo", f"地震横波已抵达{user_location}")
+        return
+    # 横波倒计时每秒刷新一次，纵波剩余秒数随之一起计算
+    p_countdown = int((p_arrival - get_bjt()).total_seconds())
+    if p_countdown > 0:
+        ui.set_text(
+            "subcdinfo",
+            f"纵波还有 {p_countdown} 秒、横波还有 {s_countdown} 秒抵达{user_location}",
+        )
+    else:
+        ui.set_text("subcdinfo", f"地震横波还有 {s_countdown} 秒抵达{user_location}")
+
+
+countdown_scheduler = CountdownScheduler(
+    on_display=show_countdown,
+    on_warning=lambda: alert("countdown", 0, time.perf_counter()),
+)
+
+
+def countdown(key, user_location, p_arrival, s_arrival, report_num=0):
     try:
-        cycle = True
-        Stime = distance / 4
-        quaketime = parse_bjt(ctime)
-        Sarrivetime = quaketime + timedelta(seconds=Stime)
-        while cycle:
-            s_countdown = int((Sarrivetime - get_bjt()).total_seconds())
-            if s_countdown <= 0 or s_countdown >= 1200:
-                s_countdown = 0
-                cycle = False
-            if s_countdown:
-                subcdinfo_text.setText(
-                    f"地震横波还有 {s_countdown} 秒抵达{user_location}"
-                )
-            else:
-                subcdinfo_text.setText(f"地震横波已抵达{user_location}")
-            if s_countdown == 9:
-                thread5 = Thread(
-                    target=alert,
-                    args=(
-                        "countdown",
-                        0,
-                    ),
-                )
-                thread5.start()
-            time.sleep(1)
+        countdown_scheduler.schedule(
+            key, s_arrival, (user_location, p_arrival), report_num
+        )
     except:
         error_report()
 
 
-def timer():
+async def clock():
     while True:
         try:
-            info_text.setText(
-                f"四川地震局  {get_bjt().strftime('%H:%M:%S')}  中国地震预警网"
+            now = get_bjt()
+            ui.set_text(
+                "info", f"四川地震局  {now.strftime('%H:%M:%S')}  中国地震预警网"
             )
+            # 对齐到下一个整秒
+            await asyncio.sleep(1 - now.microsecond / 1_000_000)
+        except asyncio.CancelledError:
+            raise
         except:
             error_report()
-            continue
-        time.sleep(1)
+            await asyncio.sleep(1)
 
 
-async def sceew(window):
-    eqtime = None
-    is_eew = False
-    global audio_bool, config_updated, websocket
-    while True:
+async def profile_startup() -> None:
+    """--profile-startup：连接成功后输出各阶段耗时并退出。"""
+    while startup.elapsed("connected") is None:
+        await asyncio.sleep(0.01)
+    print(startup.report(), flush=True)
+    QApplication.quit()
+
+
+async def sceew(
+    record_path=None, replay_path=None, speed=1.0, standby_url=None, extra_feeds=None
+):
+    stats = LatencyStats() if replay_path else None
+    events = EventStore()
+
+    # 每个未过期事件的最新一报，修改位置后据此在本地重新计算各事件的倒计时，无需重新查询数据源
+    reports: dict[tuple, EEWReport] = {}
+    # 最近一报，只用于界面文字与烈度图
+    latest: list[EEWReport | None] = [None]
+
+    def prune() -> None:
+        for key in [key for key in reports if events.get(key) is None]:
+            del reports[key]
+
+    def on_report(report: EEWReport) -> None:
         try:
-            async with websockets.connect("wss://ws-api.wolfx.jp/sc_eew") as websocket:
-                await websocket.send("query_sceew")
-                while True:
-                    sceew_json = json.loads(await websocket.recv())
-                    if sceew_json["type"] != "heartbeat":
-                        print(sceew_json)
-                        config = get_config()
-                        if not config:
-                            continue
-                        audio_bool = config["audio"]
-                        user_location = config["location"]
-                        eqtime = sceew_json["OriginTime"]
-                        location = sceew_json["HypoCenter"]
-                        magnitude = sceew_json["Magunitude"]
-                        eqdistance = distance(
-                            sceew_json["Latitude"],
-                            sceew_json["Longitude"],
-                            config["latitude"],
-                            config["longitude"],
-                        )
-                        maxshindo = sceew_json["MaxIntensity"]
-                        reportnum = sceew_json["ReportNum"]
-                        cnshindo = max(
-                            1.92 + 1.63 * magnitude - 3.49 * math.log(eqdistance, 10),
-                            0.0,
-                        )
-                        eqloc_text.setText(f"震中\n{location}\n{int(eqdistance)}km")
-                        eqmag_text.setText(f"震级\nM{magnitude}\n烈度{maxshindo}")
-                        eqtime_text.setText(
-                            f"时间\n{eqtime[0:10].replace('-', '.')}\n{eqtime[-8:]}"
-                        )
-                        if cnshindo >= 1.0 and cnshindo < 2.0:
-                            tips_text.setText(
-                                f"注意：本地烈度{cnshindo:.1f}，有轻微震感，无需采取措施"
-                            )
-                            message = f"{eqtime} {location}发生M{magnitude}地震，最大预估烈度{maxshindo}度，本地预估烈度{cnshindo:.1f}度。有轻微震感，无需采取措施。"
-                        elif cnshindo >= 2.0 and cnshindo < 4.0:
-                            tips_text.setText(
-                                f"注意：本地烈度{cnshindo:.1f}，有较强震感，请合理避险"
-                            )
-                            message = f"{eqtime} {location}发生M{magnitude}地震，最大预估烈度{maxshindo}度，本地预估烈度{cnshindo:.1f}度。有较强震感，请合理避险！"
-                        elif cnshindo >= 4.0:
-                            tips_text.setText(
-                                f"注意：本地烈度{cnshindo:.1f}，有强烈震感，请合理避险"
-                            )
-                            message = f"{eqtime} {location}发生M{magnitude}地震，最大预估烈度{maxshindo}度，本地预估烈度{cnshindo:.1f}度。有强烈震感，请合理避险！"
-                        else:
-                            tips_text.setText(
-                                f"注意：本地烈度{cnshindo:.1f}，无震感，无需采取措施"
-                            )
-                            message = f"{eqtime} {location}发生M{magnitude}地震，最大预估烈度{maxshindo}度，本地预估烈度{cnshindo:.1f}度。无震感，无需采取措施。"
-                        if (
-                            not config_updated
-                            and (get_bjt() - parse_bjt(eqtime)).total_seconds() < 300
-                        ):
-                            if config["auto_window"]:
-                                window.activateWindow()
-                            if cnshindo >= 1.0 and cnshindo < 4.0:
-                                lvl = 1
-                            elif cnshindo >= 4.0:
-                                lvl = 2
-                            else:
-                                lvl = 0
-                            Thread(target=alert, args=("EEW", lvl)).start()
-                            if not is_eew:
-                                is_eew = True
-                                thread3 = Thread(
-                                    target=countdown,
-                                    args=(
-                                        user_location,
-                                        eqdistance,
-                                        eqtime,
-                                    ),
-                                )
-                                thread3.start()
-                            if config.get("notification", False) and notify is not None:
-                                title = f"四川地震预警（第{reportnum}报）"
-                                notify(
-                                    title=title,
-                                    message=message,
-                                    app_name=f"四川地震预警(SCEEW) v{version}",
-                                    app_icon="./assets/images/icon.ico",
-                                )
-                        else:
-                            subcdinfo_text.setText(f"地震横波已抵达{user_location}")
-                        config_updated = False
-                    else:
-                        if (
-                            is_eew
-                            and eqtime is not None
-                            and (get_bjt() - parse_bjt(eqtime)).total_seconds() > 300
-                        ):
-                            is_eew = False
+            received = metrics.received
+            transition = events.update(report)
+            # 重复或更旧的报文不做任何处理
+            if transition is None:
+                return
+            latest[0] = report
+            if transition == EventStore.STALE:
+                reports.pop(report.key, None)
+            else:
+                if transition == EventStore.NEW:
+                    prune()
+                reports[report.key] = report
+            if stats is None:
+                history.record(report)
+            print(report)
+            show_report(report, transition, received)
         except:
             error_report()
-            time.sleep(1)
-            continue
+
+    def refresh() -> None:
+        """按当前设定重新计算所有未过期事件的倒计时并重新显示最近一报，不再预警；在接收循环中执行。"""
+        try:
+            config = get_config()
+            if not config:
+                return
+            prune()
+            for report in list(reports.values()):
+                if report is latest[0]:
+                    continue
+                result = evaluate_report(report, config)
+                countdown(
+                    report.key,
+                    config["location"],
+                    result["p_arrival"],
+                    result["s_arrival"],
+                    result["report_num"],
+                )
+            report = latest[0]
+            if report is not None:
+                transition = None if report.key in reports else EventStore.STALE
+                show_report(report, transition, time.perf_counter())
+        except:
+            error_report()
+
+    def show_report(report: EEWReport, transition, received: float) -> None:
+        global audio_bool
+        config = get_config()
+        if not config:
+            return
+        audio_bool = config["audio"]
+        user_location = config["location"]
+        result = evaluate_report(report, config)
+        metrics.observe("compute")
+        if stats is not None:
+            stats.lap("compute")
+        eqtime = result["origin_time"]
+        ui.set_text(
+            "eqloc",
+            f"震中\n{result['hypocenter']}\n{int(result['distance'])}km",
+            received,
+        )
+        ui.set_text(
+            "eqmag",
+            f"震级\nM{result['magnitude']}\n烈度{result['max_intensity']}",
+            received,
+        )
+        ui.set_text(
+            "eqtime",
+            f"时间\n{eqtime[0:10].replace('-', '.')}\n{eqtime[-8:]}",
+            received,
+        )
+        ui.set_text("tips", result["tips"], received)
+        show_intensity_map(
+            report.latitude,
+            report.longitude,
+            report.magnitude,
+            config["latitude"],
+            config["longitude"],
+        )
+        if transition == EventStore.STALE:
+            ui.set_text("subcdinfo", f"地震横波已抵达{user_location}")
+        else:
+            # 新事件、续报以及位置变更都需要重新计算倒计时
+            # 与 EventStore 一样按 (数据源, 事件 ID) 区分事件
+            countdown(
+                report.key,
+                user_location,
+                result["p_arrival"],
+                result["s_arrival"],
+                result["report_num"],
+            )
+        if transition in (EventStore.NEW, EventStore.UPDATE):
+            metrics.inc("alerts")
+            if config["auto_window"]:
+                # 构建窗口失败也不能影响后面的预警音效与通知
+                try:
+                    main_window.show()
+                except:
+                    error_report()
+            alert("EEW", result["level"], time.perf_counter())
+            metrics.observe("audio")
+            if config.get("notification", False):
+                title = f"四川地震预警（第{result['report_num']}报）"
+                notifier.submit(
+                    report.key,
+                    received,
+                    title=title,
+                    message=result["message"],
+                    app_name=f"四川地震预警(SCEEW) v{version}",
+                    app_icon="./assets/images/icon.ico",
+                )
+        metrics.observe("dispatch")
+        if stats is not None:
+            stats.lap("dispatch")
+
+    if replay_path:
+        await replay_feed(replay_path, on_report, speed, stats)
+        print(stats.summary(), flush=True)
+        return
+    global feed_client, refresh_display
+    recorder = FrameRecorder(record_path) if record_path else None
+    refresh_display = refresh
+    config = get_config()
+    if extra_feeds is None:
+        extra_feeds = config.get("extra_feeds", [])
+    try:
+        feeds = get_feeds(extra_feeds)
+    except ValueError:
+        error_report()
+        feeds = []
+    # feed_url 可指向局域网内的转发实例（sceew_core.py --relay）
+    feed_client = FeedClient(
+        on_report,
+        lambda websocket: startup.mark("connected"),
+        url=config.get("feed_url", FEED_URL),
+        on_frame=recorder,
+        standby_url=standby_url,
+        extra_feeds=feeds,
+    )
+    await feed_client.run()
 
 
 if __name__ == "__main__":
 
-    version = "1.3.1"
-    websocket = None
+    parser = argparse.ArgumentParser(description="四川地震预警(SCEEW)")
+    add_common_arguments(parser)
+    parser.add_argument(
+        "--tray",
+        action="store_true",
+        help="启动时只显示托盘图标，主窗口在首次打开或自动弹出时才构建",
+    )
+    parser.add_argument(
+        "--release-after",
+        type=float,
+        default=600.0,
+        help="窗口隐藏超过该秒数后释放，再次打开时重新构建；0 表示不释放",
+    )
+    args, _ = parser.parse_known_args()
+    startup.start = _started
+    startup.enabled = args.profile_startup
+    startup.mark("imports")
+    setup_logging(level=args.log_level)
+    feed_client = None
+    refresh_display = None
+    intensity_map = None
+    map_report = None
+    if args.metrics_port:
+        metrics.start(args.metrics_port)
     audio_bool = True
-    config_updated = False
     version_url = "https://tenkyuchimata.github.io/SCEEW/version.json"
 
     try:
         app = QApplication([])
-
-        class MainWindow(QMainWindow):
-            def changeEvent(self, event: QEvent) -> None:
-                if event.type() == QEvent.Type.WindowStateChange:
-                    if self.isMinimized():
-                        QTimer.singleShot(0, self.hide)
-                super().changeEvent(event)
-
-        window = MainWindow()
-        window.setWindowTitle(f"四川地震预警(SCEEW) v{version}")
-        window.setFixedSize(600, 400)
-        window.setWindowIcon(QIcon("./assets/images/icon.ico"))
-        get_update(window)
-        window.setStyleSheet("background-color: #808080;")
-        central_widget = QWidget()
-        window.setCentralWidget(central_widget)
-        layout = QVBoxLayout()
-        central_widget.setLayout(layout)
-        title_text = QLabel("四川地震预警")
-        title_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        title_text.setStyleSheet("color: white; padding-top: 10px;")
-        set_font(title_text, 25)
-        layout.addWidget(title_text)
-        warn_icon = QLabel()
-        warn_icon.setPixmap(QPixmap("./assets/images/warn.png"))
-        warn_icon.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(warn_icon)
-        subcdinfo_text = QLabel("")
-        subcdinfo_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        subcdinfo_text.setStyleSheet("color: white;")
-        set_font(subcdinfo_text, 20)
-        layout.addWidget(subcdinfo_text)
-        tips_text = QLabel("")
-        tips_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        tips_text.setStyleSheet("color: white;")
-        set_font(tips_text, 15)
-        layout.addWidget(tips_text)
-        eq_info_layout = QHBoxLayout()
-        layout.addLayout(eq_info_layout)
-        eqloc_frame = QWidget()
-        eqloc_frame.setStyleSheet("background-color: #9d9d9d;")
-        eq_info_layout.addWidget(eqloc_frame)
-        eqloc_layout = QVBoxLayout(eqloc_frame)
-        eqloc_text = QLabel("")
-        eqloc_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        eqloc_text.setStyleSheet("color: white;")
-        set_font(eqloc_text, 15)
-        eqloc_layout.addWidget(eqloc_text)
-        eqmag_frame = QWidget()
-        eqmag_frame.setStyleSheet("background-color: #9d9d9d;")
-        eq_info_layout.addWidget(eqmag_frame)
-        eqmag_layout = QVBoxLayout(eqmag_frame)
-        eqmag_text = QLabel("")
-        eqmag_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        eqmag_text.setStyleSheet("color: white;")
-        set_font(eqmag_text, 15)
-        eqmag_layout.addWidget(eqmag_text)
-        eqtime_frame = QWidget()
-        eqtime_frame.setStyleSheet("background-color: #9d9d9d;")
-        eq_info_layout.addWidget(eqtime_frame)
-        eqtime_layout = QVBoxLayout(eqtime_frame)
-        eqtime_text = QLabel("")
-        eqtime_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        eqtime_text.setStyleSheet("color: white;")
-        set_font(eqtime_text, 15)
-        eqtime_layout.addWidget(eqtime_text)
-        info_text = QLabel("")
-        info_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        info_text.setStyleSheet("color: white;")
-        set_font(info_text, 15)
-        layout.addWidget(info_text)
-        settings_button = QPushButton("⚙", window)
-        settings_button.setGeometry(560, 360, 25, 25)
-        settings_button.clicked.connect(open_settings_window)
-        tray_icon = QSystemTrayIcon(window)
+        startup.mark("qapp")
+        font_registry.load()
+        startup.mark("fonts")
+        get_travel_time_table()
+        startup.mark("traveltime")
+        try:
+            history.start()
+        except:
+            error_report()
+        startup.mark("history")
+        # 只在托盘中运行时没有可见窗口，关闭设定窗口也不应退出程序
+        app.setQuitOnLastWindowClosed(False)
+        config_watcher = watch_config(config_store, app)
+        ui = LabelBridge(app)
+        # 主窗口与设定窗口都在首次显示时才构建，隐藏一段时间后释放
+        main_window = LazyWindow(
+            build_main_window, args.release_after, release_main_window, app
+        )
+        settings_window = LazyWindow(
+            build_settings_window, args.release_after, None, app
+        )
+        tray_icon = QSystemTrayIcon(app)
         tray_icon.setIcon(QIcon("./assets/images/icon.ico"))
-        tray_menu = QMenu(window)
-        restore_action = QAction("恢复", window)
-        quit_action = QAction("退出", window)
+        tray_menu = QMenu()
+        restore_action = QAction("恢复", app)
+        quit_action = QAction("退出", app)
         tray_menu.addAction(restore_action)
         tray_menu.addAction(quit_action)
         tray_icon.setContextMenu(tray_menu)
         tray_icon.show()
-        restore_action.triggered.connect(
-            lambda: (window.showNormal(), window.activateWindow())
-        )
+        restore_action.triggered.connect(main_window.show)
         quit_action.triggered.connect(QApplication.quit)
-        window.show()
-        thread1 = Thread(target=timer, daemon=True)
-        thread2 = Thread(target=asyncio.run, args=(sceew(window),), daemon=True)
-        thread1.start()
-        thread2.start()
-        app.exec()
+        if not args.tray:
+            main_window.show()
+            # 首次绘制完成后才会执行
+            QTimer.singleShot(0, lambda: startup.mark("window"))
+        # asyncio 运行在 Qt 事件循环之上：接收、时钟、倒计时与预警都在界面线程中以任务执行
+        loop = QEventLoop(app)
+        asyncio.set_event_loop(loop)
+        countdown_scheduler.attach(loop)
+        tasks = [
+            loop.create_task(clock()),
+            loop.create_task(
+                sceew(args.record, args.replay, args.speed, args.standby, args.feed)
+            ),
+        ]
+        # 音频在窗口显示后于后台初始化，首次预警时已就绪
+        loop.run_in_executor(None, warm_up_audio)
+        if args.profile_startup:
+            tasks.append(loop.create_task(profile_startup()))
+        update_notifier = get_update(app)
+        with loop:
+            loop.run_forever()
     except:
         error_report()
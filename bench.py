@@ -0,0 +1,875 @@
+# -*- coding: utf-8 -*-
+"""
+SCEEW 性能基准
+
+用法: python bench.py [名称 ...]，不指定名称时运行全部基准。
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timedelta
+
+import numpy as np
+import websockets
+
+import sceew_core
+
+
+def _best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_sites(n_sites=10_000):
+    """多站点烈度/横波到达：逐点计算 vs 向量化计算。"""
+    rng = random.Random(0)
+    sites = [
+        (rng.uniform(26.0, 34.5), rng.uniform(97.0, 108.5)) for _ in range(n_sites)
+    ]
+    eq_lat, eq_lon, magnitude = 30.3, 102.9, 5.8
+    origin = sceew_core.get_bjt() - timedelta(seconds=5)
+
+    def scalar():
+        now = sceew_core.get_bjt()
+        for lat, lon in sites:
+            d = sceew_core.distance(eq_lat, eq_lon, lat, lon)
+            cnshindo = sceew_core.local_intensity(magnitude, d)
+            sceew_core.alert_level(cnshindo)
+            # 旧版按固定 4 km/s 横波速度估算
+            s_countdown = int(
+                (origin + timedelta(seconds=d / 4.0) - now).total_seconds()
+            )
+            if s_countdown <= 0 or s_countdown >= 1200:
+                s_countdown = 0
+
+    site_array = np.asarray(sites)
+
+    def vectorized():
+        sceew_core.evaluate_sites(eq_lat, eq_lon, magnitude, origin, site_array)
+
+    t_scalar = _best_of(scalar)
+    t_vector = _best_of(vectorized)
+    print(
+        f"sites: {n_sites} 个站点  逐点 {t_scalar * 1000:.2f} ms  "
+        f"向量化 {t_vector * 1000:.2f} ms  加速 {t_scalar / t_vector:.1f}x"
+    )
+
+
+def bench_decode(n_frames=20_000):
+    """报文解码吞吐：json.loads + 字典取值 + strptime vs decode_report。"""
+    origin = sceew_core.get_bjt().strftime("%Y-%m-%d %H:%M:%S")
+    report = json.dumps(
+        {
+            "ID": 1,
+            "EventID": "20251224103000.0001",
+            "ReportTime": origin,
+            "ReportNum": 3,
+            "OriginTime": origin,
+            "HypoCenter": "四川雅安市芦山县",
+            "Latitude": 30.3,
+            "Longitude": 102.9,
+            "Magunitude": 5.8,
+            "Depth": 10,
+            "MaxIntensity": 7,
+            "type": "sc_eew",
+        },
+        ensure_ascii=False,
+    )
+    heartbeat = json.dumps({"type": "heartbeat", "ver": 18, "id": "x", "timestamp": 1})
+    # 心跳与报文 1:1 混合
+    frames = [report, heartbeat] * (n_frames // 2)
+
+    def legacy():
+        for raw in frames:
+            data = json.loads(raw)
+            if data["type"] != "heartbeat":
+                for _ in range(2):
+                    datetime.strptime(data["OriginTime"], "%Y-%m-%d %H:%M:%S").replace(
+                        tzinfo=sceew_core.BJT
+                    )
+                (
+                    data["HypoCenter"],
+                    data["Magunitude"],
+                    data["Latitude"],
+                    data["Longitude"],
+                    data["MaxIntensity"],
+                    data["ReportNum"],
+                )
+
+    def typed():
+        for raw in frames:
+            if not sceew_core.is_heartbeat(raw):
+                sceew_core.decode_report(raw)
+
+    t_legacy = _best_of(legacy)
+    t_typed = _best_of(typed)
+    print(
+        f"decode: {n_frames} 帧 ({sceew_core._json_loads.__module__})  "
+        f"原路径 {n_frames / t_legacy:,.0f} 帧/秒  "
+        f"decode_report {n_frames / t_typed:,.0f} 帧/秒  加速 {t_legacy / t_typed:.1f}x"
+    )
+
+
+# 2000 个客户端时，转发实例从收到上游帧到写完所有客户端发送缓冲的耗时上限（秒）
+RELAY_BUDGET = {"p50": 0.04, "p99": 0.06}
+
+
+def _relay_clients(port: int, n_clients: int, n_frames: int) -> None:
+    """在独立进程中运行的转发客户端：全部连接后输出 ready，最后输出各帧的端到端延迟。"""
+
+    async def client(websocket):
+        try:
+            async for raw in websocket:
+                latencies.append(time.time() - json.loads(raw)["ts"])
+                if len(latencies) == n_clients * n_frames:
+                    done.set()
+        except websockets.ConnectionClosed:
+            pass
+
+    async def run():
+        connections = []
+        for _ in range(n_clients):
+            connections.append(
+                await websockets.connect(
+                    f"ws://127.0.0.1:{port}", compression=None, max_queue=None
+                )
+            )
+        tasks = [asyncio.create_task(client(websocket)) for websocket in connections]
+        print("ready", flush=True)
+        try:
+            await asyncio.wait_for(done.wait(), 60)
+        except asyncio.TimeoutError:
+            pass
+        for task in tasks:
+            task.cancel()
+
+    latencies, done = [], asyncio.Event()
+    asyncio.run(run())
+    print(json.dumps(latencies), flush=True)
+
+
+def bench_relay(n_clients=2000, n_frames=20, interval=0.2):
+    """
+    局域网转发：客户端在另一个进程中运行，分别统计转发实例自身的转发耗时
+    （收到上游帧到写完所有客户端的发送缓冲）与客户端收到的端到端延迟；
+    未全部送达或转发耗时超出 RELAY_BUDGET 时失败。单核机器上端到端延迟
+    还包含客户端进程处理前一帧的排队时间，只作参考。
+    """
+
+    async def run():
+        async def upstream(websocket):
+            await clients_ready.wait()
+            for _ in range(n_frames):
+                await websocket.send(
+                    json.dumps({"type": "heartbeat", "ts": time.time()})
+                )
+                await asyncio.sleep(interval)
+            await websocket.wait_closed()
+
+        def broadcast(raw):
+            # 只计转发实例自身占用的 CPU 时间，单核机器上被客户端进程抢占的时间不计入
+            start = time.thread_time()
+            forward(raw)
+            forwarded.append(time.thread_time() - start)
+
+        clients_ready, forwarded = asyncio.Event(), []
+        server = await websockets.serve(upstream, "127.0.0.1", 0)
+        relay = sceew_core.FeedRelay(
+            f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}", "127.0.0.1", 0
+        )
+        forward, relay.broadcast = relay.broadcast, broadcast
+        relay_task = asyncio.create_task(relay.run())
+        while relay._server is None:
+            await asyncio.sleep(0.01)
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        clients = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-c",
+            f"import bench; bench._relay_clients({relay.port}, {n_clients}, {n_frames})",
+            cwd=script_dir,
+            stdout=subprocess.PIPE,
+        )
+        await clients.stdout.readline()
+        while relay.client_count < n_clients:
+            await asyncio.sleep(0.01)
+        clients_ready.set()
+        output, _ = await clients.communicate()
+        latencies = json.loads(output or b"[]")
+        relay_task.cancel()
+        server.close()
+        return forwarded, latencies, relay.dropped
+
+    forwarded, latencies, dropped = asyncio.run(run())
+    relay_p50, relay_p99 = np.percentile(np.asarray(forwarded) * 1000, [50, 99])
+    p50, p99 = np.percentile(np.asarray(latencies or [0]) * 1000, [50, 99])
+    print(
+        f"relay: {n_clients} 个客户端 x {n_frames} 帧  "
+        f"送达 {len(latencies)}/{n_clients * n_frames}  "
+        f"转发耗时 p50 {relay_p50:.1f} ms  p99 {relay_p99:.1f} ms  "
+        f"端到端 p50 {p50:.1f} ms  p99 {p99:.1f} ms  "
+        f"断开慢客户端 {dropped}"
+    )
+    failed = []
+    if len(latencies) != n_clients * n_frames:
+        failed.append("未全部送达")
+    for name, value in (("p50", relay_p50), ("p99", relay_p99)):
+        if value > RELAY_BUDGET[name] * 1000:
+            failed.append(
+                f"转发耗时 {name} 超出预算 {RELAY_BUDGET[name] * 1000:.0f} ms"
+            )
+    for reason in failed:
+        print(f"relay: {reason}")
+    if failed:
+        sys.exit(1)
+
+
+def bench_feeds(n_events=50, reports_per_event=3):
+    """
+    多数据源：每个登记的数据源各连一个本地模拟上游，以各自的字段名报出同一批地震，
+    检查每次地震只预警一次，且增加数据源不会增加线程。
+    """
+    origin = sceew_core.get_bjt().strftime("%Y-%m-%d %H:%M:%S")
+    rng = random.Random(0)
+    # 相邻地震的震中相距超过去重距离
+    quakes = [(22.0 + 1.5 * (i % 10), 98.0 + 1.5 * (i // 10)) for i in range(n_events)]
+
+    def frames(source):
+        fields = source.fields
+        for i, (lat, lon) in enumerate(quakes):
+            for num in range(1, reports_per_event + 1):
+                values = {
+                    "event_id": f"{source.name}-{i}",
+                    "report_num": num,
+                    "report_time": origin,
+                    "origin_time": origin,
+                    "hypocenter": "模拟",
+                    # 各数据源的初报震中略有差异
+                    "latitude": lat + rng.uniform(-0.2, 0.2),
+                    "longitude": lon + rng.uniform(-0.2, 0.2),
+                    "magnitude": 5.0,
+                    "depth": 10,
+                    "max_intensity": 6,
+                }
+                data = {fields[k]: v for k, v in values.items() if k in fields}
+                yield json.dumps({"type": source.name, **data}, ensure_ascii=False)
+
+    async def run(names):
+        async def upstream(websocket, source):
+            if await websocket.recv() != source.query:
+                return
+            for raw in frames(source):
+                await websocket.send(raw)
+            await websocket.wait_closed()
+
+        def on_report(report):
+            transition = events.update(report)
+            if transition is not None:
+                transitions.append((transition, report.source, report.event_id))
+                if len(transitions) == n_events * reports_per_event:
+                    done.set()
+
+        events, transitions, done = sceew_core.EventStore(), [], asyncio.Event()
+        servers, sources = [], []
+        for name in names:
+            source = sceew_core.FEEDS[name]
+            server = await websockets.serve(
+                lambda websocket, source=source: upstream(websocket, source),
+                "127.0.0.1",
+                0,
+            )
+            servers.append(server)
+            port = server.sockets[0].getsockname()[1]
+            sources.append(source._replace(url=f"ws://127.0.0.1:{port}"))
+        client = sceew_core.FeedClient(
+            on_report, url=sources[0].url, extra_feeds=sources[1:]
+        )
+        start = time.perf_counter()
+        task = asyncio.create_task(client.run())
+        try:
+            await asyncio.wait_for(done.wait(), 10)
+        except asyncio.TimeoutError:
+            pass
+        elapsed = time.perf_counter() - start
+        threads = threading.active_count()
+        # 等待其他数据源较晚到达的重复报文
+        await asyncio.sleep(0.5)
+        task.cancel()
+        for server in servers:
+            server.close()
+        return transitions, threads, elapsed
+
+    failed = False
+    results = {}
+    for names in (["sc_eew"], list(sceew_core.FEEDS)):
+        transitions, threads, elapsed = asyncio.run(run(names))
+        new = sum(1 for t, _, _ in transitions if t == sceew_core.EventStore.NEW)
+        owners = {}
+        for _, source, event_id in transitions:
+            owners.setdefault(event_id.rpartition("-")[2], set()).add(source)
+        doubled = sum(1 for sources in owners.values() if len(sources) > 1)
+        results[len(names)] = threads
+        print(
+            f"feeds: {len(names)} 个数据源  预警 {new}/{n_events} 次  "
+            f"重复预警 {doubled}  处理报文 {len(transitions)}  线程 {threads}  "
+            f"{elapsed * 1000:.0f} ms"
+        )
+        failed |= new != n_events or doubled > 0
+    if failed or len(set(results.values())) > 1:
+        sys.exit(1)
+
+
+# 吞吐（条/秒）与恢复耗时（秒）；半开连接要等心跳超时才能发现，另加 heartbeat_timeout
+FAULT_BUDGET = {"throughput": 1000.0, "drop": 1.0, "half_open": 1.0}
+
+
+def bench_faults(heartbeat_timeout=1.0):
+    """
+    故障注入：FeedClient + EventStore（与 sceew() 相同的接收与处理路径）连接本地模拟数据源，
+    依次经历突发报文、格式错误的帧、心跳延迟、断线与半开连接。
+    检查没有丢报、心跳延迟未超时不重连、恢复耗时与吞吐不超出 FAULT_BUDGET。
+    """
+    from feed_server import StandInFeed
+
+    script = [
+        {"op": "heartbeat"},
+        {"op": "reports", "count": 5000, "rate": 0, "events": 50},
+        {"op": "malformed", "count": 100},
+        {"op": "stall", "seconds": heartbeat_timeout * 0.6},
+        {"op": "reports", "count": 1000, "rate": 2000, "events": 20},
+        {"op": "drop"},
+        {"op": "reports", "count": 1000, "rate": 0, "events": 20},
+        {"op": "half_open", "seconds": 10},
+        {"op": "reports", "count": 1000, "rate": 0, "events": 20},
+    ]
+
+    async def run():
+        def on_report(report):
+            received.add((report.event_id, report.report_num))
+            transitions.append(events.update(report))
+
+        feed = await StandInFeed(heartbeat_interval=heartbeat_timeout / 4).start()
+        events, received, transitions = sceew_core.EventStore(), set(), []
+        client = sceew_core.FeedClient(
+            on_report, url=feed.url, heartbeat_timeout=heartbeat_timeout
+        )
+        task = asyncio.create_task(client.run())
+        throughput = []
+        for step in script:
+            # 吞吐只从连接可用时算起，不含故障后的重连耗时
+            await feed.wait_connected()
+            start = time.perf_counter()
+            await feed.step(step)
+            deadline = time.monotonic() + 10
+            while not set(feed.sent) <= received and time.monotonic() < deadline:
+                await asyncio.sleep(0.001)
+            if step["op"] == "reports" and step["rate"] == 0:
+                throughput.append(step["count"] / (time.perf_counter() - start))
+        task.cancel()
+        await feed.close()
+        return feed, received, transitions, throughput
+
+    # 格式错误的帧与断线都会记录错误日志，这里不需要输出
+    sceew_core.logger.disabled = True
+    try:
+        feed, received, transitions, throughput = asyncio.run(run())
+    finally:
+        sceew_core.logger.disabled = False
+    lost = len(set(feed.sent) - received)
+    dropped = transitions.count(None)
+    recovery = dict(feed.recovery_times())
+    print(
+        f"faults: 发送 {len(feed.sent)} 条  丢失 {lost}  去重 {dropped}  "
+        f"连接 {feed.connections} 次  "
+        f"吞吐 {min(throughput):,.0f} 条/秒  "
+        + "  ".join(
+            f"{op} 恢复 {t * 1000:.0f} ms" if t is not None else f"{op} 未恢复"
+            for op, t in recovery.items()
+        )
+    )
+    failed = []
+    if lost:
+        failed.append(f"丢失 {lost} 条报文")
+    # 初次连接、断线与半开各一次；心跳延迟未超时不应重连
+    if feed.connections != 3:
+        failed.append(f"连接 {feed.connections} 次，应为 3 次")
+    if min(throughput) < FAULT_BUDGET["throughput"]:
+        failed.append("吞吐低于预算")
+    for op in ("drop", "half_open"):
+        budget = FAULT_BUDGET[op] + (heartbeat_timeout if op == "half_open" else 0)
+        if recovery.get(op) is None or recovery[op] > budget:
+            failed.append(f"{op} 恢复超出预算 {budget * 1000:.0f} ms")
+    for reason in failed:
+        print(f"faults: {reason}")
+    if failed:
+        sys.exit(1)
+
+
+def bench_replay(n_events=20, reports_per_event=3, age_days=3):
+    """
+    旧抓包回放：回放 age_days 天前录制的抓包（无界面模式），检查报文按录制时刻判定，
+    新事件与续报都触发预警，录制时就已过期的事件仍判为过期。
+    """
+    recorded = time.time() - age_days * 86400
+    heartbeat = json.dumps({"type": "heartbeat"})
+    frames = [{"recv": recorded, "frame": heartbeat}]
+    expected = {}
+    for event in range(n_events):
+        # 最后一个事件在录制时已超出预警时间窗
+        stale = event == n_events - 1
+        origin = recorded + event * 5 - (600 if stale else 0)
+        for num in range(1, reports_per_event + 1):
+            recv = recorded + event * 5 + num
+            origin_text = datetime.fromtimestamp(origin, sceew_core.BJT).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+            report = {
+                "type": "sc_eew",
+                "EventID": f"R{event}",
+                "ReportNum": num,
+                "OriginTime": origin_text,
+                "ReportTime": origin_text,
+                "HypoCenter": "四川",
+                "Latitude": 27.0 + event * 0.3,
+                "Longitude": 98.0 + event * 0.5,
+                "Magunitude": 5.0,
+                "Depth": 10,
+                "MaxIntensity": 6,
+            }
+            frames.append({"recv": recv, "frame": json.dumps(report)})
+            if stale:
+                expected[(f"R{event}", num)] = ("stale", False)
+            else:
+                expected[(f"R{event}", num)] = ("new" if num == 1 else "update", True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _prepare_cwd(tmp, 0)
+        capture = os.path.join(tmp, "old.jsonl")
+        with open(capture, "w", encoding="utf-8") as f:
+            for frame in frames:
+                f.write(json.dumps(frame) + "\n")
+        output = os.path.join(tmp, "out.jsonl")
+        script = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "sceew_core.py"
+        )
+        result = subprocess.run(
+            [sys.executable, script, "--replay", capture, "--speed", "0"]
+            + ["--output", output],
+            cwd=tmp,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        with open(output, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+    got = {
+        (r["event_id"], r["report_num"]): (r["transition"], r["alert"])
+        for r in records
+        if r["type"] == "report"
+    }
+    wrong = [key for key in expected if got.get(key) != expected[key]]
+    alerts = sum(alert for _, alert in got.values())
+    dispatch = [
+        line for line in result.stderr.splitlines() if line.startswith("dispatch")
+    ]
+    print(
+        f"replay: {age_days} 天前的抓包 {len(expected)} 条报文  预警 {alerts} 条  "
+        f"判定错误 {len(wrong)} 条"
+    )
+    for line in dispatch:
+        print(f"replay: {line}")
+    if wrong:
+        for key in wrong[:5]:
+            print(f"replay: {key} 应为 {expected[key]}，实际 {got.get(key)}")
+        sys.exit(1)
+
+
+def bench_history(sizes=(10_000, 100_000, 300_000), pages=20):
+    """历史记录：写入吞吐，以及分页查询耗时随记录数的变化。"""
+    rng = random.Random(0)
+    base = sceew_core.get_bjt() - timedelta(days=300)
+    with tempfile.TemporaryDirectory() as tmp:
+        history = sceew_core.ReportHistory(
+            f"{tmp}/history.db", batch_size=1000, max_pending=0
+        ).start()
+        total = 0
+        for size in sizes:
+            start = time.perf_counter()
+            for i in range(total, size):
+                origin = (base + timedelta(seconds=i * 60)).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                )
+                history.record(
+                    sceew_core.EEWReport(
+                        {
+                            "EventID": f"{i // 3}",
+                            "ReportNum": i % 3 + 1,
+                            "OriginTime": origin,
+                            "ReportTime": origin,
+                            "HypoCenter": "四川雅安市芦山县",
+                            "Latitude": 30.3,
+                            "Longitude": 102.9,
+                            "Magunitude": round(rng.uniform(2.0, 7.0), 1),
+                            "Depth": 10,
+                            "MaxIntensity": 7,
+                        }
+                    )
+                )
+            history.flush()
+            written, total = size - total, size
+            elapsed = time.perf_counter() - start
+
+            def page_through(**kwargs):
+                rows = history.query(50, **kwargs)
+                for _ in range(pages - 1):
+                    rows = history.query(
+                        50, before=(rows[-1]["origin_time"], rows[-1]["id"]), **kwargs
+                    )
+
+            t_all = _best_of(page_through) / pages
+            t_mag = _best_of(lambda: page_through(min_magnitude=6.5)) / pages
+            print(
+                f"history: {size:>7} 条  写入 {written / elapsed:,.0f} 条/秒  "
+                f"分页查询 {t_all * 1000:.2f} ms/页  按震级筛选 {t_mag * 1000:.2f} ms/页"
+            )
+        history.close()
+
+
+def bench_map(n_reports=50):
+    """预估烈度图：每条报文重算烈度层并合成缓存 QPixmap 的耗时（目标远低于 100 ms）。"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    import SCEEW
+
+    app = QApplication.instance() or QApplication([])
+    start = time.perf_counter()
+    intensity_map = SCEEW.IntensityMap()
+    t_init = time.perf_counter() - start
+    rng = random.Random(0)
+    reports = [
+        (rng.uniform(27.0, 33.5), rng.uniform(98.0, 108.0), rng.uniform(3.0, 8.0))
+        for _ in range(n_reports)
+    ]
+    grid = intensity_map._grid
+    t_grid = _best_of(lambda: [grid.to_argb(grid.compute(*r)) for r in reports])
+    t_render = _best_of(
+        lambda: [intensity_map.render_report(*r, 30.68, 104.05) for r in reports]
+    )
+    app.processEvents()
+    print(
+        f"map: {grid.width}x{grid.height}  底图与标注 {t_init * 1000:.1f} ms (一次)  "
+        f"烈度层 {t_grid / n_reports * 1000:.2f} ms/报  "
+        f"含合成 {t_render / n_reports * 1000:.2f} ms/报"
+    )
+
+
+def _proc_status(pid: int) -> tuple[int, int]:
+    """Linux 下进程的 (线程数, 常驻内存 KB)。"""
+    values = {}
+    with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            values[key] = value.split()
+    return int(values["Threads"][0]), int(values["VmRSS"][0])
+
+
+def _run_burst(n_events: int, reports_per_event: int, tmp: str) -> dict:
+    origin = sceew_core.get_bjt().strftime("%Y-%m-%d %H:%M:%S")
+    heartbeat = json.dumps({"type": "heartbeat"})
+    rng = random.Random(n_events)
+    start = time.time()
+    frames = [{"recv": start, "frame": heartbeat}]
+    # 空闲 3 秒后同一时刻到达整批报文，之后再空闲 5 秒让倒计时与音效回落
+    for event in range(n_events):
+        lat, lon = rng.uniform(27.0, 33.5), rng.uniform(98.0, 108.0)
+        for num in range(1, reports_per_event + 1):
+            report = {
+                "EventID": f"B{event}",
+                "ReportNum": num,
+                "OriginTime": origin,
+                "ReportTime": origin,
+                "HypoCenter": "四川",
+                "Latitude": lat,
+                "Longitude": lon,
+                "Magunitude": round(rng.uniform(3.0, 6.5), 1),
+                "Depth": 10,
+                "MaxIntensity": 6,
+                "type": "sc_eew",
+            }
+            frames.append(
+                {"recv": start + 3, "frame": json.dumps(report, ensure_ascii=False)}
+            )
+    frames.append({"recv": start + 8, "frame": heartbeat})
+    capture = os.path.join(tmp, f"burst{n_events}.jsonl")
+    with open(capture, "w", encoding="utf-8") as f:
+        for frame in frames:
+            f.write(json.dumps(frame, ensure_ascii=False) + "\n")
+
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", SDL_AUDIODRIVER="dummy")
+    output_path = capture + ".out"
+    output = open(output_path, "w", encoding="utf-8")
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath("SCEEW.py"), "--replay", capture],
+        cwd=tmp,
+        env=env,
+        stdout=output,
+        stderr=subprocess.DEVNULL,
+    )
+    launched = time.monotonic()
+    baseline = peak = None
+    peak_rss = 0
+    try:
+        while time.monotonic() - launched < 60:
+            time.sleep(0.05)
+            with open(output_path, encoding="utf-8", errors="ignore") as f:
+                # 回放结束时输出各阶段耗时摘要
+                if "total" in f.read():
+                    break
+            threads, rss = _proc_status(proc.pid)
+            if baseline is None and time.monotonic() - launched > 2.5:
+                baseline = (threads, rss)
+            peak = max(peak or 0, threads)
+            peak_rss = max(peak_rss, rss)
+        final = _proc_status(proc.pid)
+    finally:
+        proc.kill()
+        proc.wait()
+        output.close()
+    return {"baseline": baseline, "peak": peak, "peak_rss": peak_rss, "final": final}
+
+
+def bench_stress(sizes=(100, 500), reports_per_event=3):
+    """
+    突发压力：回放数百条报文，检查界面进程的线程数与内存是否有界
+    （线程数不随报文数增长）。需要 Linux /proc。
+    """
+    if not os.path.exists("/proc/self/status"):
+        print("stress: 需要 Linux /proc，跳过")
+        return
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.symlink(os.path.abspath("assets"), os.path.join(tmp, "assets"))
+        for n_events in sizes:
+            r = results[n_events] = _run_burst(n_events, reports_per_event, tmp)
+            print(
+                f"stress: {n_events * reports_per_event} 条报文  "
+                f"线程 空闲 {r['baseline'][0]} / 峰值 {r['peak']} / 结束 {r['final'][0]}  "
+                f"内存 空闲 {r['baseline'][1] / 1024:.0f} MB / "
+                f"峰值 {r['peak_rss'] / 1024:.0f} MB"
+            )
+    small, large = (results[n] for n in sizes)
+    bounded = (
+        large["peak"] == small["peak"]
+        and large["peak_rss"] - large["baseline"][1] < 64 * 1024
+    )
+    print(f"stress: {'通过' if bounded else '未通过'}")
+    if not bounded:
+        sys.exit(1)
+
+
+# 走时表插值最大误差（秒，远小于倒计时的 1 秒分辨率）与查询耗时上限（秒）
+TRAVEL_TIME_BUDGET = {"p_error": 0.25, "s_error": 0.5, "single": 50e-6, "sites": 0.01}
+
+
+def bench_traveltime(n_points=2000, n_sites=10_000):
+    """
+    纵横波走时表：插值查询与逐点射线计算的误差，以及单点/多点查询速度；
+    超出 TRAVEL_TIME_BUDGET 时失败。
+    """
+    table = sceew_core.get_travel_time_table()
+    rng = np.random.default_rng(0)
+    distances = rng.uniform(0.0, 1200.0, n_points)
+    depths = rng.uniform(0.0, 100.0, n_points)
+    p, s = table.lookup(distances, depths)
+    errors = []
+    for column, looked_up in ((1, p), (2, s)):
+        velocities = [layer[column] for layer in sceew_core.VELOCITY_MODEL]
+        exact = np.array(
+            [
+                sceew_core._first_arrival(velocities, np.array([d]), h)[0]
+                for d, h in zip(distances, depths)
+            ]
+        )
+        errors.append(np.abs(looked_up - exact))
+    t_single = _best_of(lambda: [table.lookup(300.0, 10.0) for _ in range(1000)]) / 1000
+    site_distances = rng.uniform(0.0, 800.0, n_sites)
+    t_sites = _best_of(lambda: table.lookup(site_distances, 12.0))
+    velocities = [layer[2] for layer in sceew_core.VELOCITY_MODEL]
+    t_direct = _best_of(
+        lambda: sceew_core._first_arrival(velocities, site_distances, 12.0), repeat=3
+    )
+    print(
+        f"traveltime: 表 {table.s.shape}  误差 纵波 p99 {np.percentile(errors[0], 99):.3f} s "
+        f"max {errors[0].max():.3f} s  横波 p99 {np.percentile(errors[1], 99):.3f} s "
+        f"max {errors[1].max():.3f} s"
+    )
+    print(
+        f"traveltime: 单点查询 {t_single * 1e6:.1f} us  "
+        f"{n_sites} 个站点 {t_sites * 1000:.2f} ms (射线计算 {t_direct * 1000:.1f} ms)"
+    )
+    measured = {
+        "p_error": errors[0].max(),
+        "s_error": errors[1].max(),
+        "single": t_single,
+        "sites": t_sites,
+    }
+    failed = False
+    for name, budget in TRAVEL_TIME_BUDGET.items():
+        if measured[name] > budget:
+            failed = True
+            print(f"traveltime: {name} {measured[name]:.6f} 超出预算 {budget}")
+    if failed:
+        sys.exit(1)
+
+
+# 启动耗时上限（秒），超出时 bench.py startup 以非零状态退出
+STARTUP_BUDGET = {
+    "gui": {"window": 1.5, "connected": 2.5},
+    "headless": {"connected": 1.5},
+}
+
+
+def _startup_phases(command: list[str], cwd: str) -> dict[str, float]:
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", SDL_AUDIODRIVER="dummy")
+    result = subprocess.run(
+        command + ["--profile-startup"],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    phases = {}
+    for line in (result.stdout + result.stderr).splitlines():
+        parts = line.split()
+        if len(parts) >= 5 and parts[0] == "startup":
+            phases[parts[1]] = float(parts[-2]) / 1000
+    return phases
+
+
+def _local_upstream() -> int:
+    """在后台线程启动只发送心跳的本地数据源，返回端口。"""
+
+    async def upstream(websocket):
+        await websocket.send(json.dumps({"type": "heartbeat"}))
+        await websocket.wait_closed()
+
+    def serve(ready, port):
+        async def main():
+            async with websockets.serve(upstream, "127.0.0.1", 0) as server:
+                port.append(server.sockets[0].getsockname()[1])
+                ready.set()
+                await asyncio.Future()
+
+        asyncio.run(main())
+
+    ready, port = threading.Event(), []
+    threading.Thread(target=serve, args=(ready, port), daemon=True).start()
+    ready.wait()
+    return port[0]
+
+
+def _prepare_cwd(tmp: str, port: int) -> None:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    os.symlink(os.path.join(script_dir, "assets"), os.path.join(tmp, "assets"))
+    with open(os.path.join(tmp, "config.json"), "w", encoding="utf-8") as f:
+        json.dump({"feed_url": f"ws://127.0.0.1:{port}"}, f)
+
+
+def bench_startup(repeat=3):
+    """冷启动：各阶段耗时，窗口显示与连接成功的耗时超出 STARTUP_BUDGET 时失败。"""
+    port = _local_upstream()
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    commands = {
+        "gui": [sys.executable, os.path.join(script_dir, "SCEEW.py")],
+        "headless": [sys.executable, os.path.join(script_dir, "sceew_core.py")],
+    }
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        _prepare_cwd(tmp, port)
+        for name, command in commands.items():
+            runs = [_startup_phases(command, tmp) for _ in range(repeat)]
+            best = {
+                phase: min(run.get(phase, float("inf")) for run in runs)
+                for phase in runs[0]
+            }
+            print(
+                f"startup {name}: "
+                + "  ".join(f"{phase} {t * 1000:.0f} ms" for phase, t in best.items())
+            )
+            for phase, budget in STARTUP_BUDGET[name].items():
+                if best.get(phase, float("inf")) > budget:
+                    failed = True
+                    print(f"startup {name}: {phase} 超出预算 {budget * 1000:.0f} ms")
+    if failed:
+        sys.exit(1)
+
+
+def _idle_rss(command: list[str], cwd: str, settle: float) -> int:
+    """启动后空闲 settle 秒时的常驻内存 KB。"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", SDL_AUDIODRIVER="dummy")
+    proc = subprocess.Popen(
+        command,
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        time.sleep(settle)
+        return _proc_status(proc.pid)[1]
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def bench_memory(repeat=3, settle=5.0):
+    """空闲内存：正常启动与只在托盘中运行（--tray）的常驻内存，托盘模式不更低时失败。"""
+    port = _local_upstream()
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SCEEW.py")
+    modes = {
+        "window": [sys.executable, script],
+        "tray": [sys.executable, script, "--tray"],
+    }
+    idle = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        _prepare_cwd(tmp, port)
+        for name, command in modes.items():
+            idle[name] = min(_idle_rss(command, tmp, settle) for _ in range(repeat))
+            print(f"memory {name}: idle RSS {idle[name] / 1024:.1f} MB")
+    saved = idle["window"] - idle["tray"]
+    print(f"memory: 托盘模式节省 {saved / 1024:.1f} MB")
+    if saved <= 0:
+        sys.exit(1)
+
+
+BENCHMARKS = {
+    "sites": bench_sites,
+    "decode": bench_decode,
+    "relay": bench_relay,
+    "feeds": bench_feeds,
+    "faults": bench_faults,
+    "replay": bench_replay,
+    "history": bench_history,
+    "map": bench_map,
+    "traveltime": bench_traveltime,
+    "stress": bench_stress,
+    "startup": bench_startup,
+    "memory": bench_memory,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
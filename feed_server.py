@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+本地模拟预警数据源：协议与 sc_eew 相同（心跳帧、query_sceew 应答、报文帧），
+可按脚本注入突发报文、断线、半开连接、心跳延迟与格式错误的帧，用于测试重连与处理逻辑：
+
+    python feed_server.py [--host HOST] [--port PORT] [--heartbeat SECONDS] [--script FILE]
+
+脚本为 JSON 数组，每一步是一个对象，按顺序执行。客户端连接后发送 query_sceew 才开始接收广播，
+发送类步骤会等到有这样的客户端：
+
+    {"op": "heartbeat"}                                   立即发送一次心跳
+    {"op": "reports", "count": 5000, "rate": 0, "events": 50}
+                                                          发送报文，rate 为每秒条数，0 表示尽快发送
+    {"op": "malformed", "count": 10}                      发送格式错误的帧
+    {"op": "stall", "seconds": 5}                         暂停发送（包括心跳）
+    {"op": "half_open", "seconds": 30}                    当前连接不再收发，到时后才真正断开
+    {"op": "drop"}                                        发送缓冲写完后直接断开当前连接
+    {"op": "sleep", "seconds": 1}                         等待，期间照常发送心跳
+"""
+
+import json
+import time
+import asyncio
+import argparse
+import websockets
+from sceew_core import get_bjt, error_report, setup_logging, logger
+
+
+class StandInFeed:
+    """
+    模拟数据源。sent 记录已发出的 (事件 ID, 报数)，connected_at 与 faults 记录每次连接与
+    注入故障的时刻（time.monotonic()），用于统计丢报与恢复耗时。
+    """
+
+    MALFORMED = (
+        '{"type": "sc_eew", "EventID": ',
+        '{"type": "sc_eew", "EventID": "X", "ReportNum": 1}',
+        '["sc_eew"]',
+        "not json",
+        '{"type": "sc_eew", "OriginTime": "bad", "HypoCenter": "x", '
+        '"Latitude": 30, "Longitude": 104, "Magunitude": 5, "MaxIntensity": 6}',
+    )
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        heartbeat_interval: float = 60.0,
+    ):
+        self._host = host
+        self.port = port
+        self._heartbeat_interval = heartbeat_interval
+        self._clients: set = set()
+        self._live = asyncio.Event()
+        self._latest: str | None = None
+        self._silent = False
+        self._server = None
+        self._heartbeat_task = None
+        self._report_id = 0
+        self._event_seq = 0
+        self.sent: list[tuple[str, int]] = []
+        self.connected_at: list[float] = []
+        self.faults: list[tuple[str, float]] = []
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self._host}:{self.port}"
+
+    @property
+    def connections(self) -> int:
+        return len(self.connected_at)
+
+    async def wait_connected(self) -> None:
+        await self._live.wait()
+
+    async def start(self) -> "StandInFeed":
+        # 关闭服务端 ping，半开连接只由客户端自己的看门狗发现
+        self._server = await websockets.serve(
+            self._serve_client, self._host, self.port, ping_interval=None
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        logger.info("feed_server: 在 %s 提供模拟数据源", self.url)
+        return self
+
+    async def close(self) -> None:
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve_client(self, websocket) -> None:
+        self.connected_at.append(time.monotonic())
+        try:
+            async for message in websocket:
+                if message != "query_sceew":
+                    continue
+                if self._latest is not None:
+                    await websocket.send(self._latest)
+                # 查询应答之后再加入广播，脚本不会在客户端就绪前执行
+                self._clients.add(websocket)
+                self._live.set()
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._forget(websocket)
+
+    def _forget(self, websocket) -> None:
+        self._clients.discard(websocket)
+        if not self._clients:
+            self._live.clear()
+
+    async def _broadcast(self, raw: str) -> bool:
+        await self._live.wait()
+        delivered = False
+        for websocket in list(self._clients):
+            try:
+                await websocket.send(raw)
+                delivered = True
+            except websockets.ConnectionClosed:
+                self._forget(websocket)
+        return delivered
+
+    def heartbeat_frame(self) -> str:
+        return json.dumps(
+            {"type": "heartbeat", "ver": 18, "timestamp": int(time.time() * 1000)}
+        )
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._heartbeat_interval)
+            if not self._silent and self._clients:
+                await self._broadcast(self.heartbeat_frame())
+
+    def report_frame(self, event_id: str, report_num: int) -> str:
+        self._report_id += 1
+        now = get_bjt().strftime("%Y-%m-%d %H:%M:%S")
+        return json.dumps(
+            {
+                "type": "sc_eew",
+                "ID": self._report_id,
+                "EventID": event_id,
+                "ReportTime": now,
+                "ReportNum": report_num,
+                "OriginTime": now,
+                "HypoCenter": "四川雅安市芦山县",
+                "Latitude": 30.3,
+                "Longitude": 102.9,
+                "Magunitude": 5.8,
+                "Depth": 10,
+                "MaxIntensity": 7,
+            },
+            ensure_ascii=False,
+        )
+
+    async def _reports(self, count: int, rate: float = 0, events: int = 1) -> None:
+        # 本步骤的报文轮流分给 events 个新事件，每个事件的报数从 1 递增
+        events = max(1, min(events, count))
+        ids = [f"S{self._event_seq + i}" for i in range(events)]
+        self._event_seq += events
+        start = time.monotonic()
+        for i in range(count):
+            if rate > 0:
+                delay = start + i / rate - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            event_id, report_num = ids[i % events], i // events + 1
+            raw = self.report_frame(event_id, report_num)
+            if await self._broadcast(raw):
+                self._latest = raw
+                self.sent.append((event_id, report_num))
+
+    async def _drain(self, websocket) -> None:
+        transport = websocket.transport
+        while transport.get_write_buffer_size() and not transport.is_closing():
+            await asyncio.sleep(0.001)
+
+    async def _half_open(self, websocket, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+        websocket.transport.abort()
+
+    async def step(self, step: dict) -> None:
+        """执行一个脚本步骤。"""
+        op = step["op"]
+        if op == "heartbeat":
+            await self._broadcast(self.heartbeat_frame())
+        elif op == "reports":
+            await self._reports(
+                int(step.get("count", 1)),
+                float(step.get("rate", 0)),
+                int(step.get("events", 1)),
+            )
+        elif op == "malformed":
+            for i in range(int(step.get("count", 1))):
+                await self._broadcast(self.MALFORMED[i % len(self.MALFORMED)])
+        elif op == "stall":
+            self._silent = True
+            self.faults.append((op, time.monotonic()))
+            try:
+                await asyncio.sleep(float(step["seconds"]))
+            finally:
+                self._silent = False
+        elif op == "half_open":
+            await self._live.wait()
+            self.faults.append((op, time.monotonic()))
+            for websocket in list(self._clients):
+                # 不再读取，客户端的 ping 与关闭握手都得不到应答
+                websocket.transport.pause_reading()
+                self._forget(websocket)
+                asyncio.create_task(
+                    self._half_open(websocket, float(step.get("seconds", 30)))
+                )
+        elif op == "drop":
+            await self._live.wait()
+            for websocket in list(self._clients):
+                await self._drain(websocket)
+                self._forget(websocket)
+                websocket.transport.abort()
+            self.faults.append((op, time.monotonic()))
+        elif op == "sleep":
+            await asyncio.sleep(float(step["seconds"]))
+        else:
+            raise ValueError(f"unknown step {op!r}")
+
+    async def run(self, script: list[dict]) -> None:
+        for step in script:
+            logger.info("feed_server: %s", step)
+            await self.step(step)
+
+    def recovery_times(self) -> list[tuple[str, float | None]]:
+        """每次断线或半开故障到下一次连接建立的耗时（秒），尚未恢复时为 None。"""
+        result = []
+        for op, at in self.faults:
+            if op == "stall":
+                continue
+            later = [t for t in self.connected_at if t > at]
+            result.append((op, later[0] - at if later else None))
+        return result
+
+
+async def serve(host: str, port: int, heartbeat: float, script_path=None) -> None:
+    feed = await StandInFeed(host, port, heartbeat).start()
+    try:
+        if script_path:
+            with open(script_path, "r", encoding="utf-8") as f:
+                await feed.run(json.load(f))
+            logger.info("feed_server: 脚本执行完毕，继续发送心跳")
+        await asyncio.Future()
+    finally:
+        await feed.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="SCEEW 本地模拟预警数据源")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--heartbeat", type=float, default=60.0, help="心跳间隔（秒）")
+    parser.add_argument("--script", help="故障注入脚本（JSON 数组）")
+    args = parser.parse_args(argv)
+    setup_logging()
+    try:
+        asyncio.run(serve(args.host, args.port, args.heartbeat, args.script))
+    except KeyboardInterrupt:
+        pass
+    except:
+        error_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2082 @@
+# -*- coding: utf-8 -*-
+"""
+SCEEW 核心逻辑：预警数据接收、震中距/烈度计算与预警判定。
+本模块不依赖 PySide6 与 pygame，可单独以无界面守护模式运行：
+
+    python sceew_core.py [--output FILE] [--config FILE] [--record FILE]
+    python sceew_core.py --replay FILE [--speed N]
+"""
+
+import time
+
+# 模块开始导入的时刻，--profile-startup 以此为起点
+_import_started = time.perf_counter()
+
+import os
+import re
+import sys
+import json
+import math
+import queue
+import atexit
+import asyncio
+import logging
+import argparse
+import bisect
+import random
+import sqlite3
+import tempfile
+import threading
+import numpy as np
+import websockets
+from websockets.frames import Frame, Opcode
+from websockets.protocol import State
+from threading import Thread
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from collections import OrderedDict
+from os import path as os_path
+from typing import Callable, Any, NamedTuple
+from datetime import datetime, timedelta, timezone
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _JSONDecodeError: type[Exception] = orjson.JSONDecodeError
+except ImportError:
+    try:
+        import msgspec
+
+        _json_loads = msgspec.json.decode
+        _JSONDecodeError = msgspec.DecodeError
+    except ImportError:
+        _json_loads = json.loads
+        _JSONDecodeError = json.JSONDecodeError
+
+version = "1.3.1"
+FEED_URL = "wss://ws-api.wolfx.jp/sc_eew"
+HEARTBEAT_TIMEOUT = 90.0
+
+
+BJT = timezone(timedelta(hours=8))
+
+
+# 回放抓包时 get_bjt() 拨回到录制时刻的偏移，见 set_clock_offset()
+_clock_offset: timedelta | None = None
+
+
+def get_bjt():
+    if _clock_offset is None:
+        return datetime.now(BJT)
+    return datetime.now(BJT) + _clock_offset
+
+
+def set_clock_offset(seconds: float) -> None:
+    """让 get_bjt() 偏移 seconds 秒，0 表示恢复为当前时间。"""
+    global _clock_offset
+    _clock_offset = timedelta(seconds=seconds) if seconds else None
+
+
+def parse_bjt(s: str) -> datetime:
+    """Parse 'YYYY-mm-dd HH:MM:SS' as timezone-aware Beijing Time."""
+    if len(s) == 19 and s[4] == "-" and s[7] == "-" and s[10] == " ":
+        try:
+            # 固定格式直接切片，比 strptime 快一个数量级
+            return datetime(
+                int(s[0:4]),
+                int(s[5:7]),
+                int(s[8:10]),
+                int(s[11:13]),
+                int(s[14:16]),
+                int(s[17:19]),
+                tzinfo=BJT,
+            )
+        except ValueError:
+            pass
+    return datetime.strptime(s, "%Y-%m-%d %H:%M:%S").replace(tzinfo=BJT)
+
+
+LOG_PATH = "errors.log"
+logger = logging.getLogger("sceew")
+_log_listener: QueueListener | None = None
+
+
+class _DropQueueHandler(QueueHandler):
+    """日志队列满时直接丢弃，绝不阻塞调用线程。"""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+class _RotatingLogHandler(RotatingFileHandler):
+    """按大小或按时间（max_age 秒）滚动的日志文件。"""
+
+    def __init__(self, filename, max_bytes, backup_count, max_age):
+        super().__init__(
+            filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        self._max_age = max_age
+        self._opened_at = time.time()
+
+    def shouldRollover(self, record) -> bool:
+        if self._max_age and time.time() - self._opened_at >= self._max_age:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self._opened_at = time.time()
+
+
+class _DuplicateFilter(logging.Filter):
+    """
+    同一位置抛出的相同异常在 interval 秒内只记录一次，其余计数，
+    到期后下一条记录附带被抑制的次数。判断时不格式化调用栈，开销很小。
+    """
+
+    def __init__(self, interval: float = 60.0, max_keys: int = 256):
+        super().__init__()
+        self._interval = interval
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+        self._seen: OrderedDict[tuple, list] = OrderedDict()
+
+    @staticmethod
+    def _key(record) -> tuple:
+        frames = []
+        if record.exc_info and record.exc_info[1] is not None:
+            exc = record.exc_info[1]
+            tb = exc.__traceback__
+            while tb is not None:
+                frames.append((tb.tb_frame.f_code.co_filename, tb.tb_lineno))
+                tb = tb.tb_next
+            return (record.levelno, record.msg, type(exc).__name__, str(exc), *frames)
+        return (record.levelno, record.msg, *record.args)
+
+    def filter(self, record) -> bool:
+        key = self._key(record)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is not None and now - entry[0] < self._interval:
+                entry[1] += 1
+                return False
+            suppressed = entry[1] if entry is not None else 0
+            self._seen[key] = [now, 0]
+            self._seen.move_to_end(key)
+            if len(self._seen) > self._max_keys:
+                self._seen.popitem(last=False)
+        if suppressed:
+            record.msg = (
+                f"{record.msg}（之前 {self._interval:g} 秒内重复 {suppressed} 次）"
+            )
+        return True
+
+
+def setup_logging(
+    path: str = LOG_PATH,
+    level: int | str = logging.INFO,
+    max_bytes: int = 1024 * 1024,
+    backup_count: int = 5,
+    max_age: float = 7 * 24 * 60 * 60,
+) -> None:
+    """
+    日志经队列交给后台线程写入：文件按大小/时间滚动，同时输出到标准错误。
+    调用线程只做去重判断和入队，不做磁盘 I/O。
+    """
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+    else:
+        atexit.register(lambda: _log_listener.stop())
+    formatter = logging.Formatter(
+        "%(asctime)s [%(levelname)s] %(message)s", "%Y-%m-%d %H:%M:%S"
+    )
+    formatter.converter = lambda t: datetime.fromtimestamp(t, BJT).timetuple()
+    file_handler = _RotatingLogHandler(path, max_bytes, backup_count, max_age)
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setFormatter(formatter)
+    log_queue: queue.Queue = queue.Queue(maxsize=10000)
+    queue_handler = _DropQueueHandler(log_queue)
+    queue_handler.addFilter(_DuplicateFilter())
+    logger.handlers[:] = [queue_handler]
+    logger.setLevel(level)
+    logger.propagate = False
+    _log_listener = QueueListener(log_queue, file_handler, console_handler)
+    _log_listener.start()
+
+
+def error_report(message: str = "unexpected error", level: int = logging.ERROR):
+    metrics.inc("errors")
+    if _log_listener is None:
+        setup_logging()
+    logger.log(level, message, exc_info=True)
+
+
+def _parse_version_from_txt(txt: str) -> str | None:
+    # 支持：version=1.2.3（允许前后有其它字段）
+    m = re.search(r"version\s*=\s*([0-9]+(?:\.[0-9]+)*)", txt)
+    return m.group(1) if m else None
+
+
+def _semver_tuple(v: str):
+    # "1.2.3" -> (1,2,3)；多段也行，缺段按 0 补
+    v = re.sub(r"[^0-9.]", "", (v or "").strip())
+    if not v:
+        return (0, 0, 0)
+    return tuple(int(x) if x else 0 for x in v.split("."))
+
+
+def _fetch_version_from_dns_txt(domain: str, timeout: float = 5.0) -> str:
+    """
+    从 DNS TXT 记录中提取 version=x.x.x 的版本号并返回。
+    """
+    # dnspython 只在检查更新时用到，延迟导入以加快启动
+    import dns.resolver
+
+    resolver = dns.resolver.Resolver(configure=True)
+    resolver.lifetime = timeout  # 总超时
+    resolver.timeout = timeout  # 单次超时
+
+    answers = resolver.resolve(domain, "TXT")
+
+    # 一个域名可能有多条 TXT，逐条找包含 version= 的
+    for rdata in answers:
+        # dnspython 返回的 TXT 可能是多段 string 切片，拼起来
+        parts = []
+        for s in getattr(rdata, "strings", []):
+            parts.append(s.decode("utf-8", errors="ignore"))
+        txt = "".join(parts).strip()
+
+        v = _parse_version_from_txt(txt)
+        if v:
+            return v
+
+    raise ValueError(f"TXT record for {domain} does not contain version=...")
+
+
+UPDATE_CACHE_PATH = "update_cache.json"
+UPDATE_CHECK_INTERVAL = 24 * 60 * 60
+
+
+def _load_update_cache() -> dict | None:
+    try:
+        with open(UPDATE_CACHE_PATH, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if time.time() - float(cache["checked_at"]) < UPDATE_CHECK_INTERVAL:
+            return cache
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def get_latest_version(timeout: float = 3.0) -> str | None:
+    """返回最新版本号；一天内只查询一次 DNS，结果缓存在本地。"""
+    cache = _load_update_cache()
+    if cache is not None:
+        return cache.get("latest_version")
+    try:
+        latest_version = _fetch_version_from_dns_txt(
+            "sceew.mtf.edu.kg", timeout=timeout
+        )
+    except Exception:
+        error_report()
+        return None
+    try:
+        with open(UPDATE_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"checked_at": time.time(), "latest_version": latest_version}, f)
+    except OSError:
+        error_report()
+    return latest_version
+
+
+DEFAULT_CONFIG = {
+    "audio": True,
+    "auto_window": True,
+    "notification": True,
+    "location": "成都市青羊区",
+    "latitude": 30.68,
+    "longitude": 104.05,
+    "feed_url": FEED_URL,
+    # 除 sc_eew 外同时订阅的数据源，见 FEEDS
+    "extra_feeds": [],
+}
+
+
+class ConfigStore:
+    """
+    线程安全的内存配置：只在 config.json 实际变化时重新读取，写入采用临时文件 + 替换。
+    读取失败（例如文件写到一半）时保留上一次的有效配置，而不是返回 None。
+    """
+
+    def __init__(self, file_path: str = "config.json"):
+        self._path = file_path
+        self._lock = threading.Lock()
+        self._data: dict | None = None
+        self._stamp = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self._path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _write(self, data: dict) -> None:
+        dir_name = os_path.dirname(os_path.abspath(self._path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".config.", suffix=".tmp", dir=dir_name)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._stamp = self._file_stamp()
+
+    def reload(self, force: bool = False) -> bool:
+        """文件有变化时重新加载，返回是否真的发生了重新加载。"""
+        with self._lock:
+            stamp = self._file_stamp()
+            if not force and self._data is not None and stamp == self._stamp:
+                return False
+            if stamp is None:
+                self._data = dict(self._data or DEFAULT_CONFIG)
+                self._write(self._data)
+                return True
+            try:
+                with open(self._path, "r", encoding="utf-8") as f:
+                    loaded = json.load(f)
+                if not isinstance(loaded, dict):
+                    raise ValueError("config.json is not an object")
+            except (OSError, ValueError):
+                error_report()
+                # 记下这次的时间戳，等文件下一次变化再重试
+                self._stamp = stamp
+                if self._data is None:
+                    self._data = dict(DEFAULT_CONFIG)
+                return False
+            self._data = {**DEFAULT_CONFIG, **loaded}
+            self._stamp = stamp
+            return True
+
+    def get(self) -> dict:
+        with self._lock:
+            data = self._data
+        if data is None:
+            self.reload()
+            with self._lock:
+                data = self._data
+        return dict(data)
+
+    def update(self, values: dict) -> None:
+        with self._lock:
+            data = {**(self._data or DEFAULT_CONFIG), **values}
+            self._write(data)
+            self._data = data
+
+
+config_store = ConfigStore("config.json")
+
+
+def get_config():
+    try:
+        return config_store.get()
+    except:
+        error_report()
+        return None
+
+
+EARTH_RADIUS = 6378.137
+MIN_DISTANCE = 1.0
+
+
+def distance(lat1, lon1, lat2, lon2):
+    try:
+        radius = EARTH_RADIUS
+        dlat = math.radians(lat2 - lat1)
+        dlon = math.radians(lon2 - lon1)
+        a = math.sin(dlat / 2) * math.sin(dlat / 2) + math.cos(
+            math.radians(lat1)
+        ) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) * math.sin(dlon / 2)
+        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        d = radius * c
+        return d
+    except:
+        error_report()
+        return 0
+
+
+def local_intensity(magnitude, eqdistance):
+    """本地预估烈度；距离过近时按 1km 计算，避免 log(0)。"""
+    return max(
+        1.92 + 1.63 * magnitude - 3.49 * math.log(max(eqdistance, MIN_DISTANCE), 10),
+        0.0,
+    )
+
+
+def alert_level(cnshindo):
+    if cnshindo >= 1.0 and cnshindo < 4.0:
+        return 1
+    elif cnshindo >= 4.0:
+        return 2
+    return 0
+
+
+class SiteEstimate(NamedTuple):
+    distance: np.ndarray  # 震中距 (km)
+    intensity: np.ndarray  # 预估烈度
+    p_arrival: np.ndarray  # 纵波到达时刻，距发震时刻的秒数
+    s_arrival: np.ndarray  # 横波到达时刻，距发震时刻的秒数
+    s_countdown: np.ndarray  # 横波距现在还有多少秒到达，已到达为 0
+    level: np.ndarray  # 预警等级 0/1/2
+
+
+def _haversine_np(eq_lat, eq_lon, lat, cos_lat, lon):
+    """震中到各点的距离 (km)；lat/lon 为弧度数组，cos_lat 可预先计算。"""
+    eq_lat_r = math.radians(eq_lat)
+    dlat = lat - eq_lat_r
+    dlon = lon - math.radians(eq_lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(eq_lat_r) * cos_lat * np.sin(dlon / 2) ** 2
+    return EARTH_RADIUS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def _intensity_np(magnitude, eqdistance):
+    """local_intensity 的向量化版本。"""
+    return np.maximum(
+        1.92 + 1.63 * magnitude - 3.49 * np.log10(np.maximum(eqdistance, MIN_DISTANCE)),
+        0.0,
+    )
+
+
+# 四川地区简化的一维分层地壳模型：(层顶深度 km, 纵波速度 km/s, 横波速度 km/s)，
+# 最后一层为半空间。修改模型后需提升 TRAVEL_TIME_VERSION 并重新生成走时表
+VELOCITY_MODEL = (
+    (0.0, 5.80, 3.40),
+    (20.0, 6.40, 3.70),
+    (40.0, 6.90, 3.95),
+    (55.0, 8.00, 4.50),
+)
+TRAVEL_TIME_VERSION = 1
+TRAVEL_TIME_PATH = "./assets/traveltime.npz"
+DEFAULT_DEPTH = 10.0
+
+
+def _first_arrival(velocities, distances, depth):
+    """
+    水平分层模型中震源深度 depth、地表各震中距处的初至走时（直达波与各界面首波取最小）。
+    velocities 为各层波速，distances 为震中距数组。
+    """
+    tops = np.array([layer[0] for layer in VELOCITY_MODEL])
+    v = np.asarray(velocities, dtype=np.float64)
+    depth = max(depth, 0.01)
+    m = int(np.searchsorted(tops, depth, side="right")) - 1
+    bottoms = np.append(tops[1:], np.inf)
+    # 直达波：震源向上穿过 0..m 层
+    up = np.minimum(bottoms[: m + 1], depth) - tops[: m + 1]
+    v_up = v[: m + 1]
+    theta = np.linspace(0.0, np.pi / 2, 4001)[:-1]
+    p = np.sin(theta)[:, None] / v_up.max()
+    cos = np.sqrt(1 - (p * v_up) ** 2)
+    x = (up * p * v_up / cos).sum(axis=1)
+    t = (up / (v_up * cos)).sum(axis=1)
+    # 超出采样范围时按最大射线参数线性外推
+    best = np.where(
+        distances <= x[-1],
+        np.interp(distances, x, t),
+        t[-1] + (distances - x[-1]) * p[-1, 0],
+    )
+    # 首波：沿震源以下各界面滑行，速度须大于其上各层
+    for k in range(m + 1, len(v)):
+        if v[k] <= v[:k].max():
+            continue
+        pk = 1 / v[k]
+        thick = bottoms[:k] - tops[:k]
+        down = thick.copy()
+        down[:m] = 0
+        down[m] = bottoms[m] - depth
+        path = thick + down
+        cos = np.sqrt(1 - (pk * v[:k]) ** 2)
+        crossover = (path * pk * v[:k] / cos).sum()
+        head = distances * pk + (path * cos / v[:k]).sum()
+        best = np.where(distances >= crossover, np.minimum(best, head), best)
+    return best
+
+
+class TravelTimeTable:
+    """
+    纵横波走时表：在 (震中距, 震源深度) 网格上预先计算初至走时，存为数组文件；
+    查询为 O(1) 的双线性插值，可一次查询任意多个点。
+    """
+
+    def __init__(self, p: np.ndarray, s: np.ndarray, distance_step, depth_step):
+        self.p = p
+        self.s = s
+        self.distance_step = float(distance_step)
+        self.depth_step = float(depth_step)
+        # 单点查询用纯 Python 列表，避免逐次的 numpy 开销
+        self._p_rows = p.tolist()
+        self._s_rows = s.tolist()
+
+    @classmethod
+    def build(
+        cls,
+        max_distance: float = 1200.0,
+        distance_step: float = 5.0,
+        max_depth: float = 100.0,
+        depth_step: float = 2.0,
+    ) -> "TravelTimeTable":
+        distances = np.arange(0.0, max_distance + distance_step / 2, distance_step)
+        depths = np.arange(0.0, max_depth + depth_step / 2, depth_step)
+        tables = []
+        for column in (1, 2):
+            velocities = [layer[column] for layer in VELOCITY_MODEL]
+            tables.append(
+                np.array(
+                    [_first_arrival(velocities, distances, h) for h in depths],
+                    dtype=np.float32,
+                )
+            )
+        return cls(tables[0], tables[1], distance_step, depth_step)
+
+    def save(self, path: str = TRAVEL_TIME_PATH) -> None:
+        np.savez_compressed(
+            path,
+            version=TRAVEL_TIME_VERSION,
+            model=np.array(VELOCITY_MODEL),
+            p=self.p,
+            s=self.s,
+            steps=np.array([self.distance_step, self.depth_step]),
+        )
+
+    @classmethod
+    def load(cls, path: str = TRAVEL_TIME_PATH) -> "TravelTimeTable":
+        """读取走时表；文件缺失、版本或速度模型不一致时重新计算。"""
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) == TRAVEL_TIME_VERSION and np.array_equal(
+                    data["model"], np.array(VELOCITY_MODEL)
+                ):
+                    return cls(data["p"], data["s"], *data["steps"])
+            logger.info("traveltime: %s 已过期，重新计算", path)
+        except FileNotFoundError:
+            logger.info("traveltime: 未找到 %s，重新计算", path)
+        except Exception:
+            error_report(f"traveltime: 无法读取 {path}")
+        return cls.build()
+
+    def _lookup(self, table, distance, depth):
+        rows, cols = table.shape
+        x = np.asarray(distance, dtype=np.float64) / self.distance_step
+        y = np.clip(
+            np.asarray(depth, dtype=np.float64) / self.depth_step, 0.0, rows - 1.0
+        )
+        # 超出最大震中距时按最后一格的斜率外推
+        i = np.clip(np.floor(x).astype(np.intp), 0, cols - 2)
+        j = np.minimum(np.floor(y).astype(np.intp), rows - 2)
+        fx = x - i
+        fy = y - j
+        top = table[j, i] + (table[j, i + 1] - table[j, i]) * fx
+        bottom = table[j + 1, i] + (table[j + 1, i + 1] - table[j + 1, i]) * fx
+        return top + (bottom - top) * fy
+
+    def _lookup_scalar(self, rows, distance: float, depth: float) -> float:
+        n_rows, n_cols = len(rows), len(rows[0])
+        x = distance / self.distance_step
+        y = min(max(depth / self.depth_step, 0.0), n_rows - 1.0)
+        i = min(max(int(x), 0), n_cols - 2)
+        j = min(int(y), n_rows - 2)
+        fx = x - i
+        fy = y - j
+        r0, r1 = rows[j], rows[j + 1]
+        top = r0[i] + (r0[i + 1] - r0[i]) * fx
+        bottom = r1[i] + (r1[i + 1] - r1[i]) * fx
+        return top + (bottom - top) * fy
+
+    def lookup(self, distance, depth=DEFAULT_DEPTH):
+        """震中距 (km)、震源深度 (km) 处的 (纵波走时, 横波走时)，单位秒；支持数组。"""
+        if np.ndim(distance) == 0 and np.ndim(depth) == 0:
+            distance, depth = float(distance), float(depth)
+            return self._lookup_scalar(
+                self._p_rows, distance, depth
+            ), self._lookup_scalar(self._s_rows, distance, depth)
+        return self._lookup(self.p, distance, depth), self._lookup(
+            self.s, distance, depth
+        )
+
+
+_travel_time_table: TravelTimeTable | None = None
+
+
+def get_travel_time_table() -> TravelTimeTable:
+    global _travel_time_table
+    if _travel_time_table is None:
+        _travel_time_table = TravelTimeTable.load()
+    return _travel_time_table
+
+
+def evaluate_sites(
+    eq_lat, eq_lon, magnitude, origin_time, sites, now=None, depth=DEFAULT_DEPTH
+):
+    """
+    一次向量化计算多个站点的震中距、预估烈度、纵横波到达时间与预警等级。
+    sites 为 (N, 2) 的 (纬度, 经度) 数组，公式与单点路径一致。
+    """
+    sites = np.asarray(sites, dtype=np.float64).reshape(-1, 2)
+    lat = np.radians(sites[:, 0])
+    eqdistance = _haversine_np(
+        eq_lat, eq_lon, lat, np.cos(lat), np.radians(sites[:, 1])
+    )
+    intensity = _intensity_np(magnitude, eqdistance)
+    p_arrival, s_arrival = get_travel_time_table().lookup(eqdistance, depth)
+    if isinstance(origin_time, str):
+        origin_time = parse_bjt(origin_time)
+    elapsed = ((now or get_bjt()) - origin_time).total_seconds()
+    s_countdown = (s_arrival - elapsed).astype(np.int64)
+    s_countdown[(s_countdown <= 0) | (s_countdown >= 1200)] = 0
+    level = np.zeros(len(sites), dtype=np.int8)
+    level[intensity >= 1.0] = 1
+    level[intensity >= 4.0] = 2
+    return SiteEstimate(eqdistance, intensity, p_arrival, s_arrival, s_countdown, level)
+
+
+# 四川省及周边范围 (纬度, 经度)
+SICHUAN_BOUNDS = (26.0, 34.4, 97.3, 108.6)
+
+# 烈度色阶，下标为取整后的烈度 (0-12)，值为 ARGB；烈度低于 1 时透明
+INTENSITY_COLORS = np.array(
+    [
+        0x00000000,
+        0x9F9CD3F8,
+        0xAF7FE5C0,
+        0xBF9BE86E,
+        0xCFF4F04B,
+        0xDFF9C73D,
+        0xE6F79A34,
+        0xE6F2672D,
+        0xE6E53327,
+        0xE6C41F2D,
+        0xE69B1436,
+        0xE6760E45,
+        0xE64E0A50,
+    ],
+    dtype=np.uint32,
+)
+
+
+class IntensityGrid:
+    """
+    固定范围的经纬度网格上的预估烈度。网格的弧度坐标与 cos(纬度) 在构造时算好，
+    每条报文只需一次向量化计算；to_argb() 按色阶转为可直接作为图像缓冲区的像素数组。
+    """
+
+    def __init__(self, width: int, height: int, bounds=SICHUAN_BOUNDS):
+        self.width = width
+        self.height = height
+        self.bounds = bounds
+        lat_min, lat_max, lon_min, lon_max = bounds
+        # 像素中心的坐标，第 0 行为最北
+        lats = lat_max - (np.arange(height) + 0.5) * (lat_max - lat_min) / height
+        lons = lon_min + (np.arange(width) + 0.5) * (lon_max - lon_min) / width
+        lat_mesh, lon_mesh = np.meshgrid(
+            np.radians(lats), np.radians(lons), indexing="ij"
+        )
+        self._lat = lat_mesh
+        self._cos_lat = np.cos(lat_mesh)
+        self._lon = lon_mesh
+
+    def to_pixel(self, lat: float, lon: float) -> tuple[float, float]:
+        lat_min, lat_max, lon_min, lon_max = self.bounds
+        return (
+            (lon - lon_min) / (lon_max - lon_min) * self.width,
+            (lat_max - lat) / (lat_max - lat_min) * self.height,
+        )
+
+    def compute(self, eq_lat: float, eq_lon: float, magnitude: float) -> np.ndarray:
+        """(height, width) 的预估烈度数组，公式与 local_intensity 一致。"""
+        eqdistance = _haversine_np(eq_lat, eq_lon, self._lat, self._cos_lat, self._lon)
+        return _intensity_np(magnitude, eqdistance)
+
+    @staticmethod
+    def to_argb(intensity: np.ndarray) -> np.ndarray:
+        index = np.clip(intensity, 0, len(INTENSITY_COLORS) - 1).astype(np.intp)
+        return INTENSITY_COLORS[index]
+
+
+class CountdownScheduler:
+    """
+    横波倒计时调度器：所有事件共用事件循环中的一个定时器，基于单调时钟，
+    在每个事件剩余秒数跳变的整秒边界唤醒，按事件分别计时。
+    schedule()/cancel() 可在任意线程调用，回调总在事件循环中执行。
+    """
+
+    MAX_COUNTDOWN = 1200
+    WARNING_AT = 9
+
+    def __init__(self, on_display: Callable, on_warning: Callable):
+        self._on_display = on_display
+        self._on_warning = on_warning
+        self._lock = threading.Lock()
+        self._events: dict[Any, dict] = {}
+        self._shown = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _seconds_left(self, arrival: float, now: float) -> int:
+        seconds = int(arrival - now)
+        if seconds <= 0 or seconds >= self.MAX_COUNTDOWN:
+            return 0
+        return seconds
+
+    def schedule(self, key, arrival_time: datetime, label: str, report_num: int = 0):
+        """新增或修正一个事件的倒计时；较旧的报数会被忽略。"""
+        with self._lock:
+            now = time.monotonic()
+            arrival = now + (arrival_time - get_bjt()).total_seconds()
+            event = self._events.get(key)
+            if event is not None and report_num < event["report_num"]:
+                return
+            if event is None:
+                warned = self._seconds_left(arrival, now) <= self.WARNING_AT
+            else:
+                warned = event["warned"]
+            self._events[key] = {
+                "arrival": arrival,
+                "label": label,
+                "report_num": report_num,
+                "warned": warned,
+            }
+        self._wake()
+
+    def cancel(self, key=None) -> None:
+        """取消指定事件的倒计时；不指定时取消全部。"""
+        with self._lock:
+            if key is None:
+                self._events.clear()
+            else:
+                self._events.pop(key, None)
+        self._wake()
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """指定运行回调的事件循环；未指定时使用第一次调用 schedule() 时所在的循环。"""
+        self._loop = loop
+
+    def _wake(self) -> None:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        self._loop.call_soon_threadsafe(self._run)
+
+    def _tick(self, now: float):
+        wait = 1.0
+        warnings = []
+        current = None
+        finished = None
+        for key, event in list(self._events.items()):
+            seconds = self._seconds_left(event["arrival"], now)
+            if not seconds:
+                del self._events[key]
+                finished = event
+                continue
+            if seconds <= self.WARNING_AT and not event["warned"]:
+                event["warned"] = True
+                warnings.append(key)
+            remaining = event["arrival"] - now
+            wait = min(wait, remaining - math.floor(remaining) + 0.001)
+            if current is None or event["arrival"] < current[0]["arrival"]:
+                current = (event, seconds)
+        if current is None and finished is not None:
+            current = (finished, 0)
+        display = None
+        if current is not None:
+            shown = (current[0]["label"], current[1])
+            if shown != self._shown:
+                self._shown = display = shown
+        return wait, display, warnings
+
+    def _run(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        with self._lock:
+            if not self._events:
+                return
+            wait, display, warnings = self._tick(time.monotonic())
+            pending = bool(self._events)
+        try:
+            if display is not None:
+                self._on_display(*display)
+            for _ in warnings:
+                self._on_warning()
+        except:
+            error_report()
+        if pending:
+            self._timer = self._loop.call_later(wait, self._run)
+
+
+class FeedSource(NamedTuple):
+    """
+    一个预警数据源：连接地址、连接后发送的查询消息，以及通用字段到该数据源字段名的映射。
+    映射中没有的可选字段（depth、max_intensity、report_time）按缺省处理。
+    """
+
+    name: str
+    url: str
+    query: str
+    fields: dict[str, str]
+
+
+_SC_FIELDS = {
+    "event_id": "EventID",
+    "report_num": "ReportNum",
+    "report_time": "ReportTime",
+    "origin_time": "OriginTime",
+    "hypocenter": "HypoCenter",
+    "latitude": "Latitude",
+    "longitude": "Longitude",
+    "magnitude": "Magunitude",
+    "depth": "Depth",
+    "max_intensity": "MaxIntensity",
+}
+
+# 同一上游提供的预警数据源；增加数据源只需在此登记地址、查询消息与字段映射
+FEEDS = {
+    "sc_eew": FeedSource("sc_eew", FEED_URL, "query_sceew", _SC_FIELDS),
+    "cenc_eew": FeedSource(
+        "cenc_eew",
+        "wss://ws-api.wolfx.jp/cenc_eew",
+        "query_cenceew",
+        {**_SC_FIELDS, "magnitude": "Magnitude"},
+    ),
+    "fj_eew": FeedSource(
+        "fj_eew",
+        "wss://ws-api.wolfx.jp/fj_eew",
+        "query_fjeew",
+        {k: v for k, v in _SC_FIELDS.items() if k not in ("depth", "max_intensity")},
+    ),
+}
+
+
+class EEWReport:
+    """
+    一条经过校验的预警报文，各数据源的字段经 FeedSource.fields 映射为同一结构；
+    时间字段在解码时只解析一次。
+    """
+
+    __slots__ = (
+        "source",
+        "event_id",
+        "report_num",
+        "report_time",
+        "origin_time",
+        "origin_time_text",
+        "hypocenter",
+        "latitude",
+        "longitude",
+        "magnitude",
+        "depth",
+        "max_intensity",
+        "raw",
+    )
+
+    def __init__(self, data: dict, source: FeedSource = FEEDS["sc_eew"]):
+        fields = source.fields
+        try:
+            self.origin_time_text = data[fields["origin_time"]]
+            self.origin_time = parse_bjt(self.origin_time_text)
+            report_time = data.get(fields.get("report_time"))
+            self.report_time = parse_bjt(report_time) if report_time else None
+            self.event_id = data.get(fields["event_id"]) or self.origin_time_text
+            self.report_num = int(data.get(fields["report_num"], 0))
+            self.hypocenter = str(data[fields["hypocenter"]])
+            self.latitude = float(data[fields["latitude"]])
+            self.longitude = float(data[fields["longitude"]])
+            self.magnitude = float(data[fields["magnitude"]])
+            depth = data.get(fields.get("depth"))
+            self.depth = float(depth) if depth is not None else None
+            if "max_intensity" in fields:
+                self.max_intensity = data[fields["max_intensity"]]
+            else:
+                # 数据源不提供最大烈度时按震中烈度估算
+                self.max_intensity = round(local_intensity(self.magnitude, 0))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"invalid {source.name} report: {e!r}") from None
+        self.source = source.name
+        self.raw = data
+
+    @property
+    def key(self) -> tuple[str, Any]:
+        """事件在所有数据源中的唯一键。"""
+        return (self.source, self.event_id)
+
+    def __repr__(self) -> str:
+        return repr(self.raw)
+
+
+_HEARTBEAT_RE = re.compile(r'"type"\s*:\s*"heartbeat"')
+
+
+def is_heartbeat(raw: str | bytes) -> bool:
+    """只检查帧开头的 type 字段判断是否为心跳，无需完整解码。"""
+    if isinstance(raw, bytes):
+        raw = raw[:64].decode("utf-8", errors="ignore")
+    return _HEARTBEAT_RE.search(raw, 0, 64) is not None
+
+
+def decode_report(raw: str | bytes, source: FeedSource = FEEDS["sc_eew"]) -> EEWReport:
+    """解码并校验一条预警报文，格式不正确时抛出 ValueError。"""
+    try:
+        data = _json_loads(raw)
+    except _JSONDecodeError as e:
+        raise ValueError(f"invalid JSON frame: {e}") from None
+    if not isinstance(data, dict):
+        raise ValueError(f"invalid {source.name} report: not an object")
+    return EEWReport(data, source)
+
+
+def get_feeds(names) -> list[FeedSource]:
+    """按名称取出登记的数据源，未知名称抛出 ValueError。"""
+    try:
+        return [FEEDS[name] for name in names]
+    except KeyError as e:
+        raise ValueError(f"unknown feed {e}, available: {', '.join(FEEDS)}") from None
+
+
+def evaluate_report(report: EEWReport, config: dict) -> dict:
+    """根据一条预警报文与本地配置计算震中距、本地烈度、预警等级与提示文本。"""
+    eqtime = report.origin_time_text
+    location = report.hypocenter
+    magnitude = report.magnitude
+    maxshindo = report.max_intensity
+    eqdistance = distance(
+        report.latitude,
+        report.longitude,
+        config["latitude"],
+        config["longitude"],
+    )
+    cnshindo = local_intensity(magnitude, eqdistance)
+    depth = DEFAULT_DEPTH if report.depth is None else report.depth
+    p_time, s_time = get_travel_time_table().lookup(eqdistance, depth)
+    if cnshindo >= 1.0 and cnshindo < 2.0:
+        feeling, advice, end = "有轻微震感", "无需采取措施", "。"
+    elif cnshindo >= 2.0 and cnshindo < 4.0:
+        feeling, advice, end = "有较强震感", "请合理避险", "！"
+    elif cnshindo >= 4.0:
+        feeling, advice, end = "有强烈震感", "请合理避险", "！"
+    else:
+        feeling, advice, end = "无震感", "无需采取措施", "。"
+    return {
+        "source": report.source,
+        "event_id": report.event_id,
+        "report_num": report.report_num,
+        "origin_time": eqtime,
+        "hypocenter": location,
+        "magnitude": magnitude,
+        "max_intensity": maxshindo,
+        "distance": eqdistance,
+        "intensity": cnshindo,
+        "level": alert_level(cnshindo),
+        "p_arrival": report.origin_time + timedelta(seconds=p_time),
+        "s_arrival": report.origin_time + timedelta(seconds=s_time),
+        "tips": f"注意：本地烈度{cnshindo:.1f}，{feeling}，{advice}",
+        "message": f"{eqtime} {location}发生M{magnitude}地震，最大预估烈度{maxshindo}度，本地预估烈度{cnshindo:.1f}度。{feeling}，{advice}{end}",
+    }
+
+
+class LatencyStats:
+    """按阶段记录每条报文（心跳除外）的处理耗时，并输出分位数。"""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self._start = 0.0
+        self._last = 0.0
+        self._pending: list[tuple[str, float]] = []
+
+    def begin(self) -> None:
+        self._start = self._last = time.perf_counter()
+        self._pending = []
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        self._pending.append((stage, now - self._last))
+        self._last = now
+
+    def end(self) -> None:
+        for stage, elapsed in self._pending:
+            self.samples.setdefault(stage, []).append(elapsed)
+        self.samples.setdefault("total", []).append(self._last - self._start)
+        self._pending = []
+
+    def percentiles(self) -> dict[str, dict[str, float]]:
+        result = {}
+        for stage, values in self.samples.items():
+            values = sorted(values)
+            n = len(values)
+            result[stage] = {
+                "count": n,
+                "p50": values[int(n * 0.50)] * 1000,
+                "p90": values[min(int(n * 0.90), n - 1)] * 1000,
+                "p99": values[min(int(n * 0.99), n - 1)] * 1000,
+                "max": values[-1] * 1000,
+            }
+        return result
+
+    def summary(self) -> str:
+        lines = []
+        for stage, p in self.percentiles().items():
+            lines.append(
+                f"{stage:<9} n={p['count']:<6} p50={p['p50']:.3f}ms "
+                f"p90={p['p90']:.3f}ms p99={p['p99']:.3f}ms max={p['max']:.3f}ms"
+            )
+        return "\n".join(lines)
+
+
+class StartupProfiler:
+    """
+    --profile-startup：记录启动各阶段（导入、初始化、窗口显示、连接成功等）
+    相对于开始导入时刻的耗时，每个阶段只记录第一次。
+    """
+
+    def __init__(self, start: float | None = None):
+        self.enabled = False
+        self.start = _import_started if start is None else start
+        self._marks: dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        if self.enabled and phase not in self._marks:
+            self._marks[phase] = time.perf_counter()
+
+    def elapsed(self, phase: str) -> float | None:
+        t = self._marks.get(phase)
+        return None if t is None else t - self.start
+
+    def report(self) -> str:
+        lines = []
+        last = self.start
+        for phase, t in self._marks.items():
+            lines.append(
+                f"startup {phase:<12} +{(t - last) * 1000:8.1f} ms  "
+                f"{(t - self.start) * 1000:8.1f} ms"
+            )
+            last = t
+        return "\n".join(lines)
+
+
+class Metrics:
+    """
+    运行指标：各阶段耗时直方图（从收到报文起算）与计数器。
+    默认关闭，关闭时 inc/observe 直接返回；开启后可通过本地 HTTP 以 Prometheus 文本格式读取。
+    """
+
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+    COUNTERS = (
+        "messages",
+        "heartbeats",
+        "duplicates",
+        "invalid",
+        "reconnects",
+        "errors",
+        "alerts",
+    )
+
+    def __init__(self):
+        self.enabled = False
+        self.received = 0.0
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(self.COUNTERS, 0)
+        self._histograms: dict[str, list] = {}
+
+    def inc(self, name: str, value: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, stage: str, since: float | None = None) -> None:
+        """记录从 since（默认为当前报文的接收时刻）到现在的耗时。"""
+        if not self.enabled:
+            return
+        elapsed = time.perf_counter() - (self.received if since is None else since)
+        with self._lock:
+            hist = self._histograms.get(stage)
+            if hist is None:
+                # [各桶计数..., +Inf 计数, 总和]
+                hist = self._histograms[stage] = [0] * (len(self.BUCKETS) + 1) + [0.0]
+            hist[bisect.bisect_left(self.BUCKETS, elapsed)] += 1
+            hist[-1] += elapsed
+
+    def _quantile(self, hist: list, q: float) -> float:
+        total = sum(hist[:-1])
+        target = q * total
+        seen = 0
+        for i, count in enumerate(hist[:-1]):
+            seen += count
+            if seen >= target and count:
+                return self.BUCKETS[i] if i < len(self.BUCKETS) else float("inf")
+        return 0.0
+
+    def render(self) -> str:
+        """Prometheus 文本格式。"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: list(v) for k, v in self._histograms.items()}
+        lines = []
+        for name, value in counters.items():
+            lines.append(f"# TYPE sceew_{name}_total counter")
+            lines.append(f"sceew_{name}_total {value}")
+        lines.append("# TYPE sceew_stage_latency_seconds histogram")
+        for stage, hist in histograms.items():
+            cumulative = 0
+            for bound, count in zip(self.BUCKETS + ("+Inf",), hist[:-1]):
+                cumulative += count
+                lines.append(
+                    f'sceew_stage_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(
+                f'sceew_stage_latency_seconds_sum{{stage="{stage}"}} {hist[-1]:.6f}'
+            )
+            lines.append(
+                f'sceew_stage_latency_seconds_count{{stage="{stage}"}} {cumulative}'
+            )
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: list(v) for k, v in self._histograms.items()}
+        parts = [f"{name}={value}" for name, value in counters.items()]
+        for stage, hist in histograms.items():
+            parts.append(
+                f"{stage} p50<={self._quantile(hist, 0.5) * 1000:g}ms "
+                f"p99<={self._quantile(hist, 0.99) * 1000:g}ms"
+            )
+        return "  ".join(parts)
+
+    def start(self, port: int = 0, log_interval: float = 60.0) -> None:
+        """开启指标；port 非 0 时在 127.0.0.1:port 提供 /metrics。"""
+        self.enabled = True
+        if port:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            registry = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+            server.daemon_threads = True
+            Thread(target=server.serve_forever, daemon=True).start()
+        if log_interval > 0:
+
+            def log_summary():
+                while True:
+                    time.sleep(log_interval)
+                    logger.info("metrics: %s", self.summary())
+
+            Thread(target=log_summary, daemon=True).start()
+
+
+metrics = Metrics()
+startup = StartupProfiler()
+
+
+class FrameRecorder:
+    """把收到的每一帧（包括心跳）连同接收时间写入 JSON Lines 抓包文件。"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def __call__(self, raw: str) -> None:
+        self._file.write(
+            json.dumps({"recv": time.time(), "frame": raw}, ensure_ascii=False) + "\n"
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _handle_frame(
+    raw, on_report, stats: LatencyStats | None, source: FeedSource = FEEDS["sc_eew"]
+) -> None:
+    metrics.received = time.perf_counter()
+    if stats is not None:
+        stats.begin()
+    if is_heartbeat(raw):
+        metrics.inc("heartbeats")
+        return
+    try:
+        report = decode_report(raw, source)
+    except ValueError:
+        # 格式错误的帧只记录并跳过，不触发重连
+        error_report()
+        metrics.inc("invalid")
+        return
+    metrics.inc("messages")
+    metrics.observe("parse")
+    if stats is not None:
+        stats.lap("parse")
+    try:
+        on_report(report)
+    except:
+        # 处理出错不应断开连接，否则重连后查询到的同一报文会被当作重复丢弃
+        error_report()
+    if stats is not None:
+        stats.end()
+
+
+class EventStore:
+    """
+    进行中地震事件的内存状态，按 (数据源, 事件 ID) 索引。每个事件只保留最新一报，
+    重复或更旧的报数直接丢弃；超过预警时间窗的事件过期，事件数有上限。
+    过期只在查到该事件时检查，另每隔 SWEEP_INTERVAL 秒整体清理一次，
+    每条报文的去重只做常数次字典查找。
+    其他数据源对同一地震（发震时刻与震中都相近）的报文只记为别名并丢弃，
+    同一地震只由最先报出的数据源预警；候选事件按发震时刻分桶，只比较相邻桶。
+    """
+
+    NEW = "new"
+    UPDATE = "update"
+    STALE = "stale"
+
+    # 判定为同一地震的发震时刻差（秒）与震中距离（km）
+    MATCH_SECONDS = 15.0
+    MATCH_DISTANCE = 100.0
+    SWEEP_INTERVAL = 30.0
+
+    def __init__(self, window: float = 300.0, max_events: int = 64):
+        self._window = window
+        self._max_events = max_events
+        self._lock = threading.Lock()
+        self._events: OrderedDict[Any, dict] = OrderedDict()
+        self._aliases: dict[Any, Any] = {}
+        # 发震时刻桶 -> 该桶内的事件键
+        self._buckets: dict[int, set] = {}
+        self._next_sweep = 0.0
+
+    def _bucket(self, report: EEWReport) -> int:
+        return int(report.origin_time.timestamp() // self.MATCH_SECONDS)
+
+    def _match(self, report: EEWReport, now: float):
+        bucket = self._bucket(report)
+        for candidate in (bucket - 1, bucket, bucket + 1):
+            for key in self._buckets.get(candidate, ()):
+                event = self._events[key]
+                other = event["report"]
+                if other.source == report.source or event["expires_at"] <= now:
+                    continue
+                seconds = abs((other.origin_time - report.origin_time).total_seconds())
+                if seconds <= self.MATCH_SECONDS and (
+                    distance(
+                        other.latitude,
+                        other.longitude,
+                        report.latitude,
+                        report.longitude,
+                    )
+                    <= self.MATCH_DISTANCE
+                ):
+                    return key
+        return None
+
+    def _unindex(self, key, bucket: int) -> None:
+        keys = self._buckets.get(bucket)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._buckets[bucket]
+
+    def _drop(self, key) -> None:
+        event = self._events.pop(key, None)
+        if event is not None:
+            self._unindex(key, event["bucket"])
+            for alias in event["aliases"]:
+                self._aliases.pop(alias, None)
+
+    def _live(self, key, now: float) -> dict | None:
+        """取出未过期的事件，已过期的顺便删除。"""
+        event = self._events.get(key)
+        if event is not None and event["expires_at"] <= now:
+            self._drop(key)
+            return None
+        return event
+
+    def update(self, report: EEWReport) -> str | None:
+        """
+        记录一条报文并返回状态变化：NEW 新事件、UPDATE 续报、
+        STALE 已超出预警时间窗的事件；重复或更旧的报文返回 None。
+        """
+        key = report.key
+        report_num = report.report_num
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._expire(now)
+            owner = self._aliases.get(key)
+            if owner is not None and self._live(owner, now) is not None:
+                metrics.inc("duplicates")
+                return None
+            event = self._live(key, now)
+            if event is None:
+                owner = self._match(report, now)
+                if owner is not None:
+                    self._aliases[key] = owner
+                    self._events[owner]["aliases"].append(key)
+                    metrics.inc("duplicates")
+                    return None
+            elif report_num <= event["report_num"]:
+                metrics.inc("duplicates")
+                return None
+            age = (get_bjt() - report.origin_time).total_seconds()
+            if age >= self._window:
+                self._drop(key)
+                return self.STALE
+            transition = self.NEW if event is None else self.UPDATE
+            bucket = self._bucket(report)
+            if event is not None and event["bucket"] != bucket:
+                # 续报修正了发震时刻
+                self._unindex(key, event["bucket"])
+            self._buckets.setdefault(bucket, set()).add(key)
+            self._events[key] = {
+                "report_num": report_num,
+                "report": report,
+                "expires_at": now + self._window - age,
+                "aliases": [] if event is None else event["aliases"],
+                "bucket": bucket,
+            }
+            self._events.move_to_end(key)
+            while len(self._events) > self._max_events:
+                self._drop(next(iter(self._events)))
+            return transition
+
+    def _expire(self, now: float) -> None:
+        self._next_sweep = now + self.SWEEP_INTERVAL
+        expired = [k for k, e in self._events.items() if e["expires_at"] <= now]
+        for key in expired:
+            self._drop(key)
+
+    def get(self, key) -> dict | None:
+        with self._lock:
+            return self._live(key, time.monotonic())
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._events)
+
+
+HISTORY_PATH = "history.db"
+
+_HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL DEFAULT 'sc_eew',
+    event_id TEXT NOT NULL,
+    report_num INTEGER NOT NULL,
+    origin_time TEXT NOT NULL,
+    report_time TEXT,
+    hypocenter TEXT,
+    latitude REAL,
+    longitude REAL,
+    magnitude REAL,
+    depth REAL,
+    max_intensity TEXT,
+    received REAL NOT NULL,
+    raw TEXT,
+    UNIQUE (source, event_id, report_num)
+);
+CREATE INDEX IF NOT EXISTS reports_event ON reports (event_id, report_num);
+CREATE INDEX IF NOT EXISTS reports_origin_time ON reports (origin_time, id);
+CREATE INDEX IF NOT EXISTS reports_magnitude ON reports (magnitude, origin_time);
+CREATE INDEX IF NOT EXISTS reports_received ON reports (received);
+"""
+
+_HISTORY_COLUMNS = (
+    "id",
+    "source",
+    "event_id",
+    "report_num",
+    "origin_time",
+    "report_time",
+    "hypocenter",
+    "latitude",
+    "longitude",
+    "magnitude",
+    "depth",
+    "max_intensity",
+)
+
+
+class ReportHistory:
+    """
+    收到的报文的本地历史 (SQLite，只追加)。
+    record() 只把报文放进有界队列，由后台线程攒批写入，不会阻塞接收循环；
+    超过保留天数的记录定期清理。查询按 (发震时间, id) 做键集分页，
+    耗时不随历史记录数增长。
+    """
+
+    def __init__(
+        self,
+        path: str = HISTORY_PATH,
+        retention_days: float = 365,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_pending: int = 10_000,
+    ):
+        self.path = path
+        self._retention = retention_days * 86400
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self._thread: Thread | None = None
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """旧版历史库没有 source 列，唯一键也不含数据源：重建表，旧记录都来自 sc_eew。"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(reports)")}
+        if not columns or "source" in columns:
+            return
+        copied = ", ".join(c for c in _HISTORY_COLUMNS if c != "source")
+        conn.executescript(
+            "BEGIN;"
+            "ALTER TABLE reports RENAME TO reports_old;"
+            "DROP INDEX IF EXISTS reports_origin_time;"
+            "DROP INDEX IF EXISTS reports_magnitude;"
+            "DROP INDEX IF EXISTS reports_received;"
+            + _HISTORY_SCHEMA
+            + f"INSERT INTO reports ({copied}, received, raw) "
+            f"SELECT {copied}, received, raw FROM reports_old;"
+            "DROP TABLE reports_old;"
+            "COMMIT;"
+        )
+
+    def start(self) -> "ReportHistory":
+        if self._thread is None:
+            conn = self._connect()
+            self._migrate(conn)
+            conn.executescript(_HISTORY_SCHEMA)
+            conn.close()
+            self._thread = Thread(target=self._run, name="history", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def record(self, report: EEWReport) -> None:
+        """把报文交给后台线程写入；队列满时丢弃并记录日志。"""
+        try:
+            self._queue.put_nowait((report, time.time()))
+        except queue.Full:
+            logger.warning("history: 写入队列已满，丢弃报文 %s", report.event_id)
+
+    @staticmethod
+    def _row(report: EEWReport, received: float) -> tuple:
+        return (
+            report.source,
+            str(report.event_id),
+            report.report_num,
+            report.origin_time.strftime("%Y-%m-%d %H:%M:%S"),
+            (
+                report.report_time.strftime("%Y-%m-%d %H:%M:%S")
+                if report.report_time
+                else None
+            ),
+            report.hypocenter,
+            report.latitude,
+            report.longitude,
+            report.magnitude,
+            report.depth,
+            str(report.max_intensity),
+            received,
+            json.dumps(report.raw, ensure_ascii=False),
+        )
+
+    def _run(self) -> None:
+        conn = self._connect()
+        next_prune = 0.0
+        stopping = False
+        taken = 0
+        while not stopping:
+            try:
+                batch = [self._queue.get()]
+                taken = 1
+                deadline = time.monotonic() + self._flush_interval
+                while len(batch) < self._batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=timeout))
+                        taken += 1
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    stopping = True
+                    batch = [item for item in batch if item is not None]
+                with conn:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO reports (source, event_id, "
+                        "report_num, origin_time, report_time, hypocenter, latitude, "
+                        "longitude, magnitude, depth, max_intensity, received, raw) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [self._row(*item) for item in batch],
+                    )
+                    if time.monotonic() >= next_prune:
+                        next_prune = time.monotonic() + 3600
+                        conn.execute(
+                            "DELETE FROM reports WHERE received < ?",
+                            (time.time() - self._retention,),
+                        )
+            except:
+                error_report("history: 写入失败")
+            for _ in range(taken):
+                self._queue.task_done()
+        conn.close()
+
+    def flush(self) -> None:
+        """等待已提交的报文全部写入。"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """写完队列中剩余的报文后停止后台线程。"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    def query(
+        self,
+        limit: int = 50,
+        before: tuple[str, int] | None = None,
+        min_magnitude: float | None = None,
+        event_id: str | None = None,
+        source: str | None = None,
+    ) -> list[dict]:
+        """
+        按发震时间倒序分页查询；before 传入上一页最后一条的
+        (origin_time, id) 即可取下一页。
+        """
+        where, params = [], []
+        if before is not None:
+            where.append("(origin_time, id) < (?, ?)")
+            params.extend(before)
+        if min_magnitude is not None:
+            where.append("magnitude >= ?")
+            params.append(min_magnitude)
+        if event_id is not None:
+            where.append("event_id = ?")
+            params.append(str(event_id))
+        if source is not None:
+            where.append("source = ?")
+            params.append(source)
+        sql = f"SELECT {', '.join(_HISTORY_COLUMNS)} FROM reports"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY origin_time DESC, id DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._reader().execute(sql, params)]
+
+    def event(self, event_id: str, source: str = "sc_eew") -> list[dict]:
+        """某一数据源中某一事件的全部报文，按报数排列。"""
+        return [
+            dict(row)
+            for row in self._reader().execute(
+                f"SELECT {', '.join(_HISTORY_COLUMNS)} FROM reports "
+                "WHERE source = ? AND event_id = ? ORDER BY report_num",
+                (source, str(event_id)),
+            )
+        ]
+
+    def __len__(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+
+class FeedClient:
+    """
+    预警数据源连接管理：指数退避加抖动的非阻塞重连、心跳间隔看门狗，
+    以及可选的热备连接。extra_feeds 中的每个数据源各占一条连接，
+    与主连接在同一事件循环中并发接收。所有连接收到的报文都交给 on_report，由 EventStore 去重。
+    其他线程通过 call_soon() 把操作交给接收循环执行。
+    """
+
+    BACKOFF_BASE = 0.5
+    BACKOFF_MAX = 30.0
+
+    def __init__(
+        self,
+        on_report: Callable[[EEWReport], Any],
+        on_connect: Callable[[Any], Any] | None = None,
+        url: str = FEED_URL,
+        on_frame: Callable[[str], Any] | None = None,
+        stats: LatencyStats | None = None,
+        standby_url: str | None = None,
+        heartbeat_timeout: float = HEARTBEAT_TIMEOUT,
+        extra_feeds: list[FeedSource] = (),
+    ):
+        self._on_report = on_report
+        self._on_connect = on_connect
+        self._url = url
+        self._on_frame = on_frame
+        self._stats = stats
+        self._standby_url = standby_url
+        self._heartbeat_timeout = heartbeat_timeout
+        self._extra_feeds = list(extra_feeds)
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def call_soon(self, callback: Callable, *args) -> bool:
+        """在接收循环中执行 callback，可在任意线程调用；循环未运行时返回 False。"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return False
+        loop.call_soon_threadsafe(callback, *args)
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2**attempt))
+
+    async def _connection(
+        self, url: str, primary: bool, source: FeedSource = FEEDS["sc_eew"]
+    ) -> None:
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(url) as websocket:
+                    if primary and self._on_connect is not None:
+                        self._on_connect(websocket)
+                    await websocket.send(source.query)
+                    while True:
+                        try:
+                            raw = await asyncio.wait_for(
+                                websocket.recv(), self._heartbeat_timeout
+                            )
+                        except asyncio.TimeoutError:
+                            # 对端可能已半开，不等待关闭握手（close_timeout）直接断开
+                            websocket.transport.abort()
+                            raise ConnectionError(
+                                f"{url} 超过 {self._heartbeat_timeout:g} 秒未收到心跳"
+                            ) from None
+                        attempt = 0
+                        if primary and self._on_frame is not None:
+                            self._on_frame(raw)
+                        _handle_frame(raw, self._on_report, self._stats, source)
+            except asyncio.CancelledError:
+                raise
+            except:
+                error_report()
+                metrics.inc("reconnects")
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        tasks = [self._connection(self._url, True)]
+        if self._standby_url:
+            tasks.append(self._connection(self._standby_url, False))
+        for source in self._extra_feeds:
+            tasks.append(self._connection(source.url, False, source))
+        await asyncio.gather(*tasks)
+
+
+async def run_feed(
+    on_report: Callable[[EEWReport], Any],
+    on_connect: Callable[[Any], Any] | None = None,
+    url: str = FEED_URL,
+    on_frame: Callable[[str], Any] | None = None,
+    stats: LatencyStats | None = None,
+    standby_url: str | None = None,
+    extra_feeds: list[FeedSource] = (),
+):
+    """连接预警数据源并持续接收，非心跳报文交给 on_report 处理；出错后重连。"""
+    await FeedClient(
+        on_report,
+        on_connect,
+        url,
+        on_frame,
+        stats,
+        standby_url,
+        extra_feeds=extra_feeds,
+    ).run()
+
+
+async def replay_feed(
+    capture_path: str,
+    on_report: Callable[[EEWReport], Any],
+    speed: float = 1.0,
+    stats: LatencyStats | None = None,
+):
+    """
+    按抓包文件中的接收时间回放报文。speed 为回放倍速，0 表示不等待、尽快回放。
+    每一帧处理前把 get_bjt() 拨回到该帧的接收时刻，旧抓包中的报文按录制时的
+    时间判定是否过期、计算倒计时；回放结束后保留最后一帧的偏移。
+    """
+    with open(capture_path, "r", encoding="utf-8") as f:
+        frames = [json.loads(line) for line in f if line.strip()]
+    if not frames:
+        return
+    first = frames[0]["recv"]
+    start = time.monotonic()
+    for frame in frames:
+        if speed > 0:
+            delay = (frame["recv"] - first) / speed - (time.monotonic() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            # 尽快回放时也让出事件循环，界面与其他任务不会被整段回放阻塞
+            await asyncio.sleep(0)
+        try:
+            set_clock_offset(frame["recv"] - time.time())
+            _handle_frame(frame["frame"], on_report, stats)
+        except:
+            error_report()
+
+
+class FeedRelay:
+    """
+    局域网转发：本实例保持一条上游连接，把收到的每一帧（包括心跳）转发给本地客户端。
+    每一帧只编码、分帧一次，直接写入所有客户端的发送缓冲，不必为每个客户端唤醒发送任务；
+    发送缓冲超过 max_buffer 字节的慢客户端会被断开，不会拖慢其他客户端。
+    指定热备上游时两条连接收到的帧都会转发，报文按 (EventID, ReportNum) 去重，
+    任一上游断开时客户端仍能收到报文。
+    """
+
+    SEEN_MAX = 256
+
+    def __init__(
+        self,
+        upstream_url: str = FEED_URL,
+        host: str = "0.0.0.0",
+        port: int = 8765,
+        max_buffer: int = 64 * 1024,
+        standby_url: str | None = None,
+    ):
+        self._upstream_url = upstream_url
+        self._standby_url = standby_url
+        self._host = host
+        self.port = port
+        self._max_buffer = max_buffer
+        self._clients: set = set()
+        self._latest: str | None = None
+        self._seen: OrderedDict[tuple, None] = OrderedDict()
+        self._server = None
+        self.dropped = 0
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def _drop(self, websocket) -> None:
+        self._clients.discard(websocket)
+        self.dropped += 1
+        metrics.inc("relay_dropped")
+        logger.warning(
+            "relay: 客户端 %s 发送缓冲已满，断开连接", websocket.remote_address
+        )
+        asyncio.ensure_future(websocket.close(1013, "slow consumer"))
+
+    @staticmethod
+    def _report_key(raw) -> tuple | None:
+        try:
+            data = _json_loads(raw)
+        except _JSONDecodeError:
+            return None
+        if not isinstance(data, dict) or data.get("EventID") is None:
+            return None
+        return (data["EventID"], data.get("ReportNum"))
+
+    def broadcast(self, raw: str) -> None:
+        if not is_heartbeat(raw):
+            key = self._report_key(raw)
+            if key is not None:
+                # 主备上游会各发一次同一报文
+                if key in self._seen:
+                    return
+                self._seen[key] = None
+                if len(self._seen) > self.SEEN_MAX:
+                    self._seen.popitem(last=False)
+            self._latest = raw
+        # 服务端发出的帧不加掩码，且未启用压缩，所有客户端收到的字节完全相同
+        frame = Frame(Opcode.TEXT, raw.encode()).serialize(mask=False)
+        for websocket in list(self._clients):
+            transport = websocket.transport
+            if transport.get_write_buffer_size() > self._max_buffer:
+                self._drop(websocket)
+            elif websocket.state is State.OPEN:
+                transport.write(frame)
+
+    async def _serve_client(self, websocket) -> None:
+        self._clients.add(websocket)
+        try:
+            async for message in websocket:
+                if message == "query_sceew" and self._latest is not None:
+                    websockets.broadcast([websocket], self._latest)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._clients.discard(websocket)
+
+    async def start(self) -> None:
+        # 每条消息要发给大量客户端，关闭压缩以免逐连接压缩
+        self._server = await websockets.serve(
+            self._serve_client, self._host, self.port, compression=None
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(
+            "relay: 在 %s:%s 转发 %s", self._host, self.port, self._upstream_url
+        )
+
+    async def run(self) -> None:
+        await self.start()
+        # 主备上游各用一个只转发原始帧的连接，两边的帧都经 broadcast 去重后转发
+        urls = [self._upstream_url]
+        if self._standby_url:
+            urls.append(self._standby_url)
+        await asyncio.gather(
+            *(
+                FeedClient(lambda report: None, url=url, on_frame=self.broadcast).run()
+                for url in urls
+            )
+        )
+
+
+class JsonLineWriter:
+    """以 JSON Lines 格式输出事件，每行立即刷新。"""
+
+    def __init__(self, output_path: str | None = None):
+        if output_path:
+            self._file = open(output_path, "a", encoding="utf-8")
+        else:
+            self._file = sys.stdout
+
+    def write(self, record_type: str, **fields) -> None:
+        record = {"type": record_type, "time": get_bjt().isoformat(), **fields}
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+
+
+async def headless(
+    output_path: str | None = None,
+    store=None,
+    url: str | None = None,
+    record_path: str | None = None,
+    replay_path: str | None = None,
+    speed: float = 1.0,
+    standby_url: str | None = None,
+    history_path: str | None = None,
+    extra_feeds: list[str] | None = None,
+) -> None:
+    """无界面守护模式：只接收预警、计算并以 JSON Lines 输出预警判定。"""
+    store = store or config_store
+    url = url or store.get()["feed_url"]
+    feeds = get_feeds(
+        store.get()["extra_feeds"] if extra_feeds is None else extra_feeds
+    )
+    writer = JsonLineWriter(output_path)
+    events = EventStore()
+    history = ReportHistory(history_path).start() if history_path else None
+    stats = LatencyStats() if replay_path else None
+
+    def on_connect(websocket) -> None:
+        startup.mark("connected")
+        writer.write("connected", url=url)
+
+    def on_report(report: EEWReport) -> None:
+        try:
+            transition = events.update(report)
+            if transition is None:
+                return
+            if history is not None:
+                history.record(report)
+            result = evaluate_report(report, store.get())
+            metrics.observe("compute")
+            if stats is not None:
+                stats.lap("compute")
+            alert = transition != EventStore.STALE
+            if alert:
+                metrics.inc("alerts")
+            writer.write("report", transition=transition, alert=alert, **result)
+            metrics.observe("dispatch")
+            if stats is not None:
+                stats.lap("dispatch")
+        except:
+            error_report()
+
+    if replay_path:
+        await replay_feed(replay_path, on_report, speed, stats)
+        print(stats.summary(), file=sys.stderr)
+        return
+
+    async def poll_config() -> None:
+        while True:
+            await asyncio.sleep(5)
+            try:
+                store.reload()
+            except:
+                error_report()
+
+    recorder = FrameRecorder(record_path) if record_path else None
+    poller = asyncio.create_task(poll_config())
+    try:
+        await run_feed(
+            on_report,
+            on_connect,
+            url,
+            recorder,
+            standby_url=standby_url,
+            extra_feeds=feeds,
+        )
+    finally:
+        poller.cancel()
+        if recorder is not None:
+            recorder.close()
+        if history is not None:
+            history.close()
+
+
+async def _profile_startup(feed) -> None:
+    """运行到连接成功为止，然后输出启动各阶段耗时。"""
+    task = asyncio.create_task(feed)
+    while startup.elapsed("connected") is None and not task.done():
+        await asyncio.sleep(0.01)
+    task.cancel()
+    print(startup.report(), file=sys.stderr, flush=True)
+
+
+def add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    """图形界面与无界面模式共用的命令行参数。"""
+    parser.add_argument(
+        "--standby",
+        nargs="?",
+        const=FEED_URL,
+        help="同时保持一条热备连接（默认连接同一数据源），报文去重后处理",
+    )
+    parser.add_argument(
+        "--feed",
+        action="append",
+        choices=[name for name in FEEDS if name != "sc_eew"],
+        help="同时订阅的其他数据源，可重复指定；默认使用配置文件中的 extra_feeds",
+    )
+    parser.add_argument("--record", help="把收到的所有帧写入主连接的抓包文件")
+    parser.add_argument(
+        "--replay", help="回放抓包文件代替实时数据，并统计各阶段处理耗时"
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="回放倍速，0 表示尽快回放"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=0,
+        help="在 127.0.0.1 的该端口提供 Prometheus 格式的 /metrics，并定期输出指标摘要",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="日志级别",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="输出启动各阶段耗时，连接成功后退出",
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="SCEEW 无界面守护模式")
+    parser.add_argument("--output", help="JSON Lines 输出文件，默认输出到标准输出")
+    parser.add_argument("--config", default="config.json", help="配置文件路径")
+    parser.add_argument("--url", help="预警数据源地址，默认使用配置文件中的 feed_url")
+    parser.add_argument("--history", help="把收到的报文写入该 SQLite 历史数据库")
+    parser.add_argument(
+        "--build-traveltime",
+        nargs="?",
+        const=TRAVEL_TIME_PATH,
+        metavar="PATH",
+        help="按当前速度模型重新生成纵横波走时表后退出",
+    )
+    parser.add_argument(
+        "--relay",
+        metavar="[HOST:]PORT",
+        help="转发模式：连接上游数据源，并在该地址向局域网客户端转发",
+    )
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+    startup.enabled = args.profile_startup
+    startup.mark("imports")
+    if args.build_traveltime:
+        TravelTimeTable.build().save(args.build_traveltime)
+        return
+    setup_logging(level=args.log_level)
+    if args.metrics_port:
+        metrics.start(args.metrics_port)
+    try:
+        if args.relay:
+            host, _, port = args.relay.rpartition(":")
+            store = ConfigStore(args.config)
+            relay = FeedRelay(
+                args.url or store.get()["feed_url"],
+                host or "0.0.0.0",
+                int(port),
+                standby_url=args.standby,
+            )
+            asyncio.run(relay.run())
+            return
+        store = ConfigStore(args.config)
+        store.get()
+        startup.mark("config")
+        get_travel_time_table()
+        startup.mark("traveltime")
+        feed = headless(
+            args.output,
+            store,
+            args.url,
+            args.record,
+            args.replay,
+            args.speed,
+            args.standby,
+            args.history,
+            args.feed,
+        )
+        asyncio.run(_profile_startup(feed) if args.profile_startup else feed)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()